@@ -5,6 +5,7 @@
 //  CLI для тестирования логики TextSwitcher без UI и разрешений.
 //  Теперь с контекстным трекингом!
 //  Запуск: ./build/Build/Products/Debug/TextSwitcherCLI "текст для теста"
+//  Batch:  ./build/Build/Products/Debug/TextSwitcherCLI --batch  (строка stdin → строка результата)
 //
 
 import Foundation
@@ -254,6 +255,11 @@ struct TextSwitcherCLI {
     nonisolated(unsafe) static let contextTracker = ContextTracker()
 
     static func main() {
+        if CommandLine.arguments.dropFirst().first == "--batch" {
+            runBatch()
+            return
+        }
+
         print("═══════════════════════════════════════════════════════════")
         print("  TextSwitcher CLI — с контекстной валидацией")
         print("═══════════════════════════════════════════════════════════")
@@ -294,6 +300,27 @@ struct TextSwitcherCLI {
         print("═══════════════════════════════════════════════════════════")
     }
 
+    /// Первая строка stdout в batch-режиме: по ней раннер отличает бинарник без
+    /// --batch (тот напечатает баннер и примет флаг за тест-кейс)
+    static let batchReadyMarker = "TEXTSWITCHER_BATCH_READY"
+
+    /// Batch-режим для тест-раннера: одна строка stdin → одна строка результата в stdout.
+    /// Процесс запускается один раз на весь прогон вместо запуска на каждый тест.
+    /// Подробный лог processText уходит в stderr, чтобы в stdout были только результаты.
+    static func runBatch() {
+        let resultFD = dup(STDOUT_FILENO)
+        dup2(STDERR_FILENO, STDOUT_FILENO)
+        let results = FileHandle(fileDescriptor: resultFD, closeOnDealloc: true)
+        results.write(Data((batchReadyMarker + "\n").utf8))
+
+        while let line = readLine() {
+            // Каждая строка — отдельный тест-кейс, как и аргументы в обычном режиме
+            contextTracker.clear()
+            let result = processText(line)
+            results.write(Data((result + "\n").utf8))
+        }
+    }
+
     // MARK: - Public API for Tests
 
     /// Обрабатывает текст и возвращает результат (для тестов)
@@ -318,7 +345,8 @@ struct TextSwitcherCLI {
 
     // MARK: - Processing
 
-    static func processText(_ text: String) {
+    @discardableResult
+    static func processText(_ text: String) -> String {
         // ════════════════════════════════════════════════════════════════
         // PRE-TOKENIZATION CHECK: Sensitive strings (UUID, JWT, API keys)
         // Проверяем ВЕСЬ текст ДО токенизации, чтобы защитить строки с `-` и `_`
@@ -329,7 +357,7 @@ struct TextSwitcherCLI {
             print("  ИТОГОВЫЙ РЕЗУЛЬТАТ:")
             print("  Вход:  \"\(text)\"")
             print("  Выход: \"\(text)\"")
-            return
+            return text
         }
 
         // PRE-TOKENIZATION CHECK: Corrupted file paths (зфслфпу.json → package.json)
@@ -340,7 +368,7 @@ struct TextSwitcherCLI {
             print("  ИТОГОВЫЙ РЕЗУЛЬТАТ:")
             print("  Вход:  \"\(text)\"")
             print("  Выход: \"\(corrected)\"")
-            return
+            return corrected
         }
 
         // Токенизация с сохранением пунктуации
@@ -364,6 +392,7 @@ struct TextSwitcherCLI {
 
         print("  Вход:  \"\(text)\"")
         print("  Выход: \"\(result)\"")
+        return result
     }
 
     static func extractWords(from text: String) -> [String] {
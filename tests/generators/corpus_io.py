@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Shared corpus I/O for the generator and runner scripts.
+
+The canonical corpus is the JSON array in ../test_corpus_v2.json; every
+script reads and rewrites that file. NDJSON (one test per line) is only an
+optional extra output for tools that want to stream it.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _dumps_pretty = lambda d: orjson.dumps(d, option=orjson.OPT_INDENT_2)
+else:
+    _dumps = lambda d: json.dumps(d, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    _dumps_pretty = lambda d: json.dumps(d, ensure_ascii=False, indent=2).encode('utf-8')
+
+def load_corpus(path: str) -> List[Dict]:
+    """Load a corpus (JSON array, or NDJSON for *.ndjson), via orjson when installed."""
+    if path.endswith('.ndjson'):
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(path, 'rb') as f:
+            return [loads(line) for line in f if line.strip()]
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_corpus(tests: Iterable[Dict], output_path: str,
+                ndjson_path: Optional[str] = None,
+                pretty_path: Optional[str] = None) -> int:
+    """Stream test dicts into a compact JSON array, plus an NDJSON copy when
+    ndjson_path is given and an indented copy when pretty_path is given.
+    Returns the number of tests written.
+
+    tests may be a generator still reading the old output_path, so each file
+    is written to <path>.tmp and os.replace()d over its target once complete.
+    """
+    count = 0
+    temps = {}
+    try:
+        for path in (output_path, ndjson_path, pretty_path):
+            if path:
+                temps[path] = open(f'{path}.tmp', 'wb')
+        f = temps[output_path]
+        nf = temps.get(ndjson_path)
+        pf = temps.get(pretty_path)
+        f.write(b'[')
+        if pf:
+            pf.write(b'[')
+        for count, t in enumerate(tests, 1):
+            line = _dumps(t)
+            if count > 1:
+                f.write(b',')
+            f.write(line)
+            if nf:
+                nf.write(line + b'\n')
+            if pf:
+                pf.write(b',\n  ' if count > 1 else b'\n  ')
+                pf.write(_dumps_pretty(t).replace(b'\n', b'\n  '))
+        f.write(b']')
+        if pf:
+            pf.write(b'\n]' if count else b']')
+        for tf in temps.values():
+            tf.close()
+    except BaseException:
+        for tf in temps.values():
+            tf.close()
+            os.unlink(tf.name)
+        raise
+    for path, tf in temps.items():
+        os.replace(tf.name, path)
+    return count
@@ -4,19 +4,19 @@ Main Test Generator for TextSwitcher
 Generates comprehensive test dataset (~15,000 tests) for QWERTY ↔ ЙЦУКЕН validation.
 
 Usage:
-    python main_generator.py
+    python main_generator.py [--pretty]
 
 Output:
-    ../test_corpus_v2.json
+    ../test_corpus_v2.json         (compact)
+    ../test_corpus_v2.pretty.json  (indented, only with --pretty)
 """
 
-import json
-import os
-import re
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+from dataclasses import dataclass
 from pathlib import Path
 
+from corpus_io import save_corpus
+
 # MARK: - QWERTY ↔ ЙЦУКЕН Mapping
 
 # English QWERTY -> Russian ЙЦУКЕН (when typing Russian with EN layout)
@@ -45,13 +45,18 @@ RU_TO_EN = {
     'Б': '<', 'Ю': '>', 'Ё': '~',
 }
 
+# Every key and value is a single character, so both directions reduce to a
+# codepoint table for str.translate (one C-level pass, no per-char Python).
+_EN_TO_RU_TABLE = str.maketrans(EN_TO_RU)
+_RU_TO_EN_TABLE = str.maketrans(RU_TO_EN)
+
 def convert_en_to_ru(text: str) -> str:
     """Convert text typed in EN layout to RU characters."""
-    return ''.join(EN_TO_RU.get(c, c) for c in text)
+    return text.translate(_EN_TO_RU_TABLE)
 
 def convert_ru_to_en(text: str) -> str:
     """Convert text typed in RU layout to EN characters."""
-    return ''.join(RU_TO_EN.get(c, c) for c in text)
+    return text.translate(_RU_TO_EN_TABLE)
 
 def corrupt_ru_word(word: str) -> str:
     """Corrupt Russian word as if typed with EN layout (ghbdtn -> привет)."""
@@ -64,7 +69,9 @@ def corrupt_en_word(word: str) -> str:
 
 # MARK: - Test Case Model
 
-@dataclass
+_TC_FIELDS = ('id', 'category', 'input', 'expected', 'should_convert', 'notes')
+
+@dataclass(slots=True)
 class TestCase:
     id: str
     category: str
@@ -73,8 +80,11 @@ class TestCase:
     should_convert: bool
     notes: str = ""
 
-    def to_dict(self) -> dict:
-        d = asdict(self)
+    @property
+    def as_dict(self) -> dict:
+        """JSON-ready dict (empty notes omitted)."""
+        # Slots instances have no __dict__; read the flat fields in declaration order
+        d = {name: getattr(self, name) for name in _TC_FIELDS}
         if not d['notes']:
             del d['notes']
         return d
@@ -93,6 +103,8 @@ def load_wordlist(filename: str) -> List[str]:
 
 def load_json(filename: str):
     """Load JSON file."""
+    import json
+
     filepath = Path(__file__).parent.parent.parent / "Dictum" / "Resources" / filename
     if not filepath.exists():
         print(f"Warning: {filepath} not found")
@@ -116,9 +128,8 @@ def load_tech_buzzwords() -> List[str]:
 
 # MARK: - Category Generators
 
-def generate_ru_common_words(limit: int = 2000) -> List[TestCase]:
+def generate_ru_common_words(limit: int = 2000) -> Iterator[TestCase]:
     """Generate tests for common Russian words (typed with EN layout)."""
-    tests = []
     words = load_wordlist("ru_top_2000.txt")[:limit]
 
     for i, word in enumerate(words):
@@ -128,19 +139,16 @@ def generate_ru_common_words(limit: int = 2000) -> List[TestCase]:
         # Skip if corruption produces same text (numbers, punctuation)
         if corrupted == word:
             continue
-        tests.append(TestCase(
+        yield TestCase(
             id=f"ru_common_{i:04d}",
             category="ru_common_words",
             input=corrupted,
             expected=word,
             should_convert=True
-        ))
-
-    return tests
+        )
 
-def generate_en_common_words(limit: int = 2000) -> List[TestCase]:
+def generate_en_common_words(limit: int = 2000) -> Iterator[TestCase]:
     """Generate tests for common English words (typed with RU layout)."""
-    tests = []
     words = load_wordlist("en_top_2000.txt")[:limit]
 
     for i, word in enumerate(words):
@@ -150,19 +158,16 @@ def generate_en_common_words(limit: int = 2000) -> List[TestCase]:
         # Skip if corruption produces same text
         if corrupted == word:
             continue
-        tests.append(TestCase(
+        yield TestCase(
             id=f"en_common_{i:04d}",
             category="en_common_words",
             input=corrupted,
             expected=word,
             should_convert=True
-        ))
+        )
 
-    return tests
-
-def generate_tech_buzzwords() -> List[TestCase]:
+def generate_tech_buzzwords() -> Iterator[TestCase]:
     """Generate tests for tech buzzwords (should NOT convert)."""
-    tests = []
     buzzwords = load_tech_buzzwords()
 
     for i, word in enumerate(buzzwords):
@@ -170,32 +175,29 @@ def generate_tech_buzzwords() -> List[TestCase]:
             continue
 
         # Tech buzzwords should NOT be converted
-        tests.append(TestCase(
+        yield TestCase(
             id=f"buzz_{i:04d}",
             category="tech_buzzwords",
             input=word,
             expected=word,
             should_convert=False,
             notes="tech_term"
-        ))
+        )
 
         # Also test corrupted version (typed with wrong layout)
         corrupted = corrupt_en_word(word)
         if corrupted != word and len(corrupted) > 1:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"buzz_corrupt_{i:04d}",
                 category="tech_buzzwords_corrupted",
                 input=corrupted,
                 expected=word,
                 should_convert=True,
                 notes="tech_term_restore"
-            ))
-
-    return tests
+            )
 
-def generate_companies_services() -> List[TestCase]:
+def generate_companies_services() -> Iterator[TestCase]:
     """Generate tests for company/service names (should NOT convert when typed correctly)."""
-    tests = []
 
     # Comprehensive list of companies and services
     companies = [
@@ -258,32 +260,29 @@ def generate_companies_services() -> List[TestCase]:
 
     for i, company in enumerate(companies):
         # Company name typed correctly - should NOT convert
-        tests.append(TestCase(
+        yield TestCase(
             id=f"company_{i:04d}",
             category="companies_services",
             input=company,
             expected=company,
             should_convert=False,
             notes="brand_name"
-        ))
+        )
 
         # Company name typed with RU layout - should convert back
         corrupted = corrupt_en_word(company)
         if corrupted != company:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"company_corrupt_{i:04d}",
                 category="companies_services_corrupted",
                 input=corrupted,
                 expected=company,
                 should_convert=True,
                 notes="brand_restore"
-            ))
+            )
 
-    return tests
-
-def generate_short_words() -> List[TestCase]:
+def generate_short_words() -> Iterator[TestCase]:
     """Generate tests for short words (1-3 chars) - prepositions, conjunctions, particles."""
-    tests = []
 
     # Russian short words
     ru_short = [
@@ -319,33 +318,30 @@ def generate_short_words() -> List[TestCase]:
     for i, word in enumerate(ru_short):
         corrupted = corrupt_ru_word(word)
         if corrupted != word:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"short_ru_{i:04d}",
                 category="short_words_ru",
                 input=corrupted,
                 expected=word,
                 should_convert=True,
                 notes="short_ru"
-            ))
+            )
 
     # Generate EN short word tests
     for i, word in enumerate(en_short):
         corrupted = corrupt_en_word(word)
         if corrupted != word:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"short_en_{i:04d}",
                 category="short_words_en",
                 input=corrupted,
                 expected=word,
                 should_convert=True,
                 notes="short_en"
-            ))
-
-    return tests
+            )
 
-def generate_shifted_symbols() -> List[TestCase]:
+def generate_shifted_symbols() -> Iterator[TestCase]:
     """Generate tests for shifted symbol combinations."""
-    tests = []
 
     # Words with shifted symbols that map to Russian letters
     shifted_tests = [
@@ -385,20 +381,17 @@ def generate_shifted_symbols() -> List[TestCase]:
     ]
 
     for i, (inp, exp) in enumerate(shifted_tests):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"shifted_{i:04d}",
             category="shifted_symbols",
             input=inp,
             expected=exp,
             should_convert=True,
             notes="shifted_key"
-        ))
+        )
 
-    return tests
-
-def generate_code_switching() -> List[TestCase]:
+def generate_code_switching() -> Iterator[TestCase]:
     """Generate tests for code-switching (RU text with EN terms)."""
-    tests = []
 
     code_switch_examples = [
         # Format: (corrupted_input, expected_output)
@@ -423,20 +416,17 @@ def generate_code_switching() -> List[TestCase]:
     ]
 
     for i, (inp, exp) in enumerate(code_switch_examples):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"codeswitch_{i:04d}",
             category="code_switching",
             input=inp,
             expected=exp,
             should_convert=True,
             notes="mixed_lang"
-        ))
-
-    return tests
+        )
 
-def generate_sensitive_data() -> List[TestCase]:
+def generate_sensitive_data() -> Iterator[TestCase]:
     """Generate tests for sensitive data that should NOT be converted."""
-    tests = []
 
     sensitive_patterns = [
         # Emails
@@ -505,20 +495,17 @@ def generate_sensitive_data() -> List[TestCase]:
     ]
 
     for i, (data, data_type) in enumerate(sensitive_patterns):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"sensitive_{i:04d}",
             category="sensitive_data",
             input=data,
             expected=data,
             should_convert=False,
             notes=data_type
-        ))
+        )
 
-    return tests
-
-def generate_cli_commands() -> List[TestCase]:
+def generate_cli_commands() -> Iterator[TestCase]:
     """Generate tests for CLI commands (should NOT convert)."""
-    tests = []
 
     cli_commands = [
         # Git
@@ -549,34 +536,31 @@ def generate_cli_commands() -> List[TestCase]:
     ]
 
     for i, cmd in enumerate(cli_commands):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"cli_{i:04d}",
             category="cli_commands",
             input=cmd,
             expected=cmd,
             should_convert=False,
             notes="cli"
-        ))
+        )
 
     # Also test corrupted CLI commands (typed with RU layout)
     cli_single_words = ["git", "npm", "docker", "pip", "brew", "kubectl", "curl", "wget"]
     for i, cmd in enumerate(cli_single_words):
         corrupted = corrupt_en_word(cmd)
         if corrupted != cmd:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"cli_corrupt_{i:04d}",
                 category="cli_commands_corrupted",
                 input=corrupted,
                 expected=cmd,
                 should_convert=True,
                 notes="cli_restore"
-            ))
-
-    return tests
+            )
 
-def generate_file_paths() -> List[TestCase]:
+def generate_file_paths() -> Iterator[TestCase]:
     """Generate tests for file paths and config files."""
-    tests = []
 
     config_files = [
         ".gitignore", ".env", ".dockerignore", ".eslintrc", ".prettierrc",
@@ -588,34 +572,31 @@ def generate_file_paths() -> List[TestCase]:
 
     for i, filename in enumerate(config_files):
         # Config file typed correctly - should NOT convert
-        tests.append(TestCase(
+        yield TestCase(
             id=f"file_{i:04d}",
             category="file_paths",
             input=filename,
             expected=filename,
             should_convert=False,
             notes="config_file"
-        ))
+        )
 
     # Test corrupted versions
     file_names_to_corrupt = ["package", "config", "index", "main", "server", "client"]
     for i, name in enumerate(file_names_to_corrupt):
         corrupted = corrupt_en_word(name)
         if corrupted != name:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"file_corrupt_{i:04d}",
                 category="file_paths_corrupted",
                 input=f"{corrupted}.json",
                 expected=f"{name}.json",
                 should_convert=True,
                 notes="filename_restore"
-            ))
+            )
 
-    return tests
-
-def generate_camelcase_snake() -> List[TestCase]:
+def generate_camelcase_snake() -> Iterator[TestCase]:
     """Generate tests for CamelCase and snake_case identifiers."""
-    tests = []
 
     identifiers = [
         # CamelCase
@@ -635,33 +616,30 @@ def generate_camelcase_snake() -> List[TestCase]:
 
     for i, ident in enumerate(identifiers):
         # Identifiers typed correctly - should NOT convert (they're code)
-        tests.append(TestCase(
+        yield TestCase(
             id=f"ident_{i:04d}",
             category="identifiers",
             input=ident,
             expected=ident,
             should_convert=False,
             notes="code_identifier"
-        ))
-
-    return tests
+        )
 
-def generate_uppercase() -> List[TestCase]:
+def generate_uppercase() -> Iterator[TestCase]:
     """Generate tests for UPPERCASE words."""
-    tests = []
 
     # Russian uppercase (corrupted from EN layout)
     ru_upper = ["ПРИВЕТ", "ВНИМАНИЕ", "ВАЖНО", "СРОЧНО", "ОШИБКА", "ТЕСТ"]
     for i, word in enumerate(ru_upper):
         corrupted = corrupt_ru_word(word)
         if corrupted != word:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"upper_ru_{i:04d}",
                 category="uppercase_ru",
                 input=corrupted,
                 expected=word,
                 should_convert=True
-            ))
+            )
 
     # English uppercase abbreviations - should NOT convert
     en_upper = [
@@ -671,20 +649,17 @@ def generate_uppercase() -> List[TestCase]:
         "README", "TODO", "FIXME", "NOTE", "WARN", "DEBUG", "INFO",
     ]
     for i, abbr in enumerate(en_upper):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"upper_en_{i:04d}",
             category="uppercase_en",
             input=abbr,
             expected=abbr,
             should_convert=False,
             notes="abbreviation"
-        ))
+        )
 
-    return tests
-
-def generate_punctuation() -> List[TestCase]:
+def generate_punctuation() -> Iterator[TestCase]:
     """Generate tests for words with punctuation."""
-    tests = []
 
     # Russian words with punctuation (corrupted)
     punct_tests = [
@@ -703,19 +678,16 @@ def generate_punctuation() -> List[TestCase]:
     ]
 
     for i, (inp, exp) in enumerate(punct_tests):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"punct_{i:04d}",
             category="punctuation",
             input=inp,
             expected=exp,
             should_convert=True
-        ))
-
-    return tests
+        )
 
-def generate_numbers_mixed() -> List[TestCase]:
+def generate_numbers_mixed() -> Iterator[TestCase]:
     """Generate tests for mixed text with numbers."""
-    tests = []
 
     mixed_tests = [
         # Numbers should be preserved
@@ -743,19 +715,16 @@ def generate_numbers_mixed() -> List[TestCase]:
         else:
             inp, exp, should_conv = item
 
-        tests.append(TestCase(
+        yield TestCase(
             id=f"mixed_{i:04d}",
             category="numbers_mixed",
             input=inp,
             expected=exp,
             should_convert=should_conv
-        ))
+        )
 
-    return tests
-
-def generate_stress_tests() -> List[TestCase]:
+def generate_stress_tests() -> Iterator[TestCase]:
     """Generate stress tests - valid text that should NOT be converted."""
-    tests = []
 
     # Valid English sentences
     en_sentences = [
@@ -777,14 +746,14 @@ def generate_stress_tests() -> List[TestCase]:
     ]
 
     for i, sentence in enumerate(en_sentences):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"stress_en_{i:04d}",
             category="stress_test_en",
             input=sentence,
             expected=sentence,
             should_convert=False,
             notes="valid_en"
-        ))
+        )
 
     # Valid Russian sentences
     ru_sentences = [
@@ -806,20 +775,17 @@ def generate_stress_tests() -> List[TestCase]:
     ]
 
     for i, sentence in enumerate(ru_sentences):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"stress_ru_{i:04d}",
             category="stress_test_ru",
             input=sentence,
             expected=sentence,
             should_convert=False,
             notes="valid_ru"
-        ))
-
-    return tests
+        )
 
-def generate_edge_cases() -> List[TestCase]:
+def generate_edge_cases() -> Iterator[TestCase]:
     """Generate edge case tests."""
-    tests = []
 
     edge_cases = [
         # Single character (ambiguous)
@@ -853,20 +819,17 @@ def generate_edge_cases() -> List[TestCase]:
     ]
 
     for i, (inp, exp, should_conv) in enumerate(edge_cases):
-        tests.append(TestCase(
+        yield TestCase(
             id=f"edge_{i:04d}",
             category="edge_cases",
             input=inp,
             expected=exp,
             should_convert=should_conv,
             notes="edge"
-        ))
-
-    return tests
+        )
 
-def generate_sentences_ru() -> List[TestCase]:
+def generate_sentences_ru() -> Iterator[TestCase]:
     """Generate Russian sentence tests."""
-    tests = []
 
     # Common Russian sentences (will be corrupted)
     sentences = [
@@ -890,19 +853,16 @@ def generate_sentences_ru() -> List[TestCase]:
     for i, sentence in enumerate(sentences):
         corrupted = corrupt_ru_word(sentence)
         if corrupted != sentence:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"sentence_ru_{i:04d}",
                 category="sentences_ru",
                 input=corrupted,
                 expected=sentence,
                 should_convert=True
-            ))
+            )
 
-    return tests
-
-def generate_sentences_en() -> List[TestCase]:
+def generate_sentences_en() -> Iterator[TestCase]:
     """Generate English sentence tests (typed with RU layout)."""
-    tests = []
 
     sentences = [
         "Hello how are you",
@@ -925,23 +885,19 @@ def generate_sentences_en() -> List[TestCase]:
     for i, sentence in enumerate(sentences):
         corrupted = corrupt_en_word(sentence)
         if corrupted != sentence:
-            tests.append(TestCase(
+            yield TestCase(
                 id=f"sentence_en_{i:04d}",
                 category="sentences_en",
                 input=corrupted,
                 expected=sentence,
                 should_convert=True
-            ))
-
-    return tests
+            )
 
 
 # MARK: - Main Generator
 
-def generate_all_tests() -> List[TestCase]:
-    """Generate all test cases."""
-    all_tests = []
-
+def generate_all_tests() -> Iterator[TestCase]:
+    """Generate all test cases, one category generator at a time."""
     generators = [
         ("Russian common words", generate_ru_common_words),
         ("English common words", generate_en_common_words),
@@ -964,69 +920,74 @@ def generate_all_tests() -> List[TestCase]:
     ]
 
     for name, generator in generators:
-        tests = generator()
-        print(f"  {name}: {len(tests)} tests")
-        all_tests.extend(tests)
-
-    return all_tests
-
-def deduplicate_tests(tests: List[TestCase]) -> List[TestCase]:
-    """Remove duplicate tests based on (input, expected) pair."""
+        count = 0
+        for test in generator():
+            count += 1
+            yield test
+        print(f"  {name}: {count} tests")
+
+def deduplicate_tests(tests: Iterable[TestCase]) -> Iterator[TestCase]:
+    """Yield tests whose (input, expected) pair has not been seen yet."""
     seen = set()
-    unique = []
-
-    for test in tests:
-        key = (test.input, test.expected)
-        if key not in seen:
-            seen.add(key)
-            unique.append(test)
-
-    return unique
+    seen_add = seen.add
+    # seen_add() returns None, so "not seen_add(k)" records the key and keeps t
+    return (t for t in tests if (k := (t.input, t.expected)) not in seen and not seen_add(k))
 
 def main():
+    import sys
+
     print("=" * 60)
     print("TextSwitcher Test Generator v2.0")
     print("=" * 60)
     print()
 
+    output_path = Path(__file__).parent.parent / "test_corpus_v2.json"
+    pretty_path = output_path.with_suffix('.pretty.json') if '--pretty' in sys.argv else None
+
+    # Tests flow generator -> dedup -> file one at a time; only the dedup
+    # keys and these counters stay resident.
+    generated = 0
+    should_convert = 0
+    categories: Dict[str, int] = {}
+
+    def count_generated(tests: Iterable[TestCase]) -> Iterator[TestCase]:
+        nonlocal generated
+        for t in tests:
+            generated += 1
+            yield t
+
+    def count_unique(tests: Iterable[TestCase]) -> Iterator[TestCase]:
+        nonlocal should_convert
+        for t in tests:
+            should_convert += t.should_convert
+            categories[t.category] = categories.get(t.category, 0) + 1
+            yield t
+
     print("Generating tests...")
-    all_tests = generate_all_tests()
+    tests = count_unique(deduplicate_tests(count_generated(generate_all_tests())))
+    total = save_corpus((t.as_dict for t in tests), output_path, pretty_path=pretty_path)
     print()
 
-    print(f"Total before dedup: {len(all_tests)}")
-    unique_tests = deduplicate_tests(all_tests)
-    print(f"Total after dedup: {len(unique_tests)}")
+    print(f"Total before dedup: {generated}")
+    print(f"Total after dedup: {total}")
     print()
 
-    # Convert to dict format
-    output = [t.to_dict() for t in unique_tests]
-
-    # Calculate stats
-    should_convert = sum(1 for t in unique_tests if t.should_convert)
-    should_not = len(unique_tests) - should_convert
+    should_not = total - should_convert
 
     print("Statistics:")
-    print(f"  Should convert: {should_convert} ({100*should_convert/len(unique_tests):.1f}%)")
-    print(f"  Should NOT convert: {should_not} ({100*should_not/len(unique_tests):.1f}%)")
+    print(f"  Should convert: {should_convert} ({100*should_convert/total:.1f}%)")
+    print(f"  Should NOT convert: {should_not} ({100*should_not/total:.1f}%)")
     print()
 
-    # Count by category
-    categories = {}
-    for t in unique_tests:
-        categories[t.category] = categories.get(t.category, 0) + 1
-
     print("By category:")
     for cat, count in sorted(categories.items()):
         print(f"  {cat}: {count}")
     print()
 
-    # Save to file
-    output_path = Path(__file__).parent.parent / "test_corpus_v2.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
-
     print(f"Saved to: {output_path}")
     print(f"File size: {output_path.stat().st_size / 1024:.1f} KB")
+    if pretty_path:
+        print(f"Pretty copy: {pretty_path}")
 
 if __name__ == "__main__":
     main()
@@ -2,13 +2,18 @@
 """
 Mega test generator - creates thousands of additional tests for TextSwitcher.
 Goal: Reach 15,000+ tests with balanced should_convert ratio.
+
+Usage:
+    python mega_generator.py [--pretty] [--notes]
+
+    --notes  also write each new test's category note (omitted by default)
 """
 
-import json
-import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import List, Set, Tuple
 
+from corpus_io import load_corpus, save_corpus
+
 # QWERTY to ЙЦУКЕН mapping
 QWERTY_TO_RUSSIAN = {
     'q': 'й', 'w': 'ц', 'e': 'у', 'r': 'к', 't': 'е', 'y': 'н', 'u': 'г', 'i': 'ш', 'o': 'щ', 'p': 'з',
@@ -21,22 +26,62 @@ QWERTY_TO_RUSSIAN = {
     'Z': 'Я', 'X': 'Ч', 'C': 'С', 'V': 'М', 'B': 'И', 'N': 'Т', 'M': 'Ь'
 }
 
-RUSSIAN_TO_QWERTY = {v: k for k, v in QWERTY_TO_RUSSIAN.items()}
+# Reverse map and both str.translate codepoint tables in one pass. A plain
+# {v: k} inversion would silently drop a key if two keys shared a character.
+RUSSIAN_TO_QWERTY = {}
+_EN_TO_RU_TABLE = {}
+_RU_TO_EN_TABLE = {}
+for _en, _ru in QWERTY_TO_RUSSIAN.items():
+    if len(_en) != 1 or len(_ru) != 1:
+        raise ValueError(f"Layout mapping must be char-to-char: {_en!r} -> {_ru!r}")
+    if _ru in RUSSIAN_TO_QWERTY:
+        raise ValueError(f"Duplicate layout mapping: {RUSSIAN_TO_QWERTY[_ru]!r} and {_en!r} -> {_ru!r}")
+    RUSSIAN_TO_QWERTY[_ru] = _en
+    _EN_TO_RU_TABLE[ord(_en)] = _ru
+    _RU_TO_EN_TABLE[ord(_ru)] = _en
+del _en, _ru
+
+_TC_FIELDS = ('id', 'category', 'input', 'expected', 'should_convert')
+
+# Every mega test's note is determined by its category and should_convert,
+# so it is not stored per test; notes_for() recovers it (see --notes).
+CATEGORY_NOTES = {
+    ("companies_services", False): "Valid company/service name",
+    ("cli_commands", False): "Valid CLI command",
+    ("identifiers", False): "Valid identifier/filename",
+    ("stress_tests_en", False): "Valid English sentence",
+    ("ru_common_words", True): "Corrupted Russian word",
+    ("ru_phrases", True): "Corrupted Russian IT phrase",
+    ("uppercase", True): "Corrupted Russian uppercase",
+    ("uppercase", False): "Valid English uppercase",
+    ("code_switching", True): "Code-switching RU+EN",
+    ("short_words", True): "Short Russian word corrupted",
+    ("short_words", False): "Valid English short word",
+    ("sensitive_data", False): "Sensitive data - never convert",
+}
+
+def notes_for(category: str, should_convert: bool) -> str:
+    """Human-readable note for a mega test category ("" if unknown)."""
+    return CATEGORY_NOTES.get((category, should_convert), "")
 
-@dataclass
+@dataclass(slots=True)
 class TestCase:
     id: str
     category: str
     input: str
     expected: str
     should_convert: bool
-    notes: str = ""
+
+    @property
+    def as_dict(self) -> dict:
+        """JSON-ready dict."""
+        return {name: getattr(self, name) for name in _TC_FIELDS}
 
 def convert_en_to_ru(text: str) -> str:
-    return ''.join(QWERTY_TO_RUSSIAN.get(c, c) for c in text)
+    return text.translate(_EN_TO_RU_TABLE)
 
 def convert_ru_to_en(text: str) -> str:
-    return ''.join(RUSSIAN_TO_QWERTY.get(c, c) for c in text)
+    return text.translate(_RU_TO_EN_TABLE)
 
 # ============================================================================
 # TECH COMPANIES & SERVICES (NO CONVERT - valid English)
@@ -113,6 +158,11 @@ GAMING = [
     "Riot", "Rockstar", "CD Projekt", "FromSoftware", "Capcom", "Konami", "Sega"
 ]
 
+_ALL_COMPANIES = (
+    *TECH_GIANTS, *CLOUD_PROVIDERS, *DEV_TOOLS, *AI_SERVICES, *DATABASES,
+    *FRAMEWORKS, *RUSSIAN_SERVICES, *CRYPTO_SERVICES, *SOCIAL_MEDIA, *GAMING,
+)
+
 # ============================================================================
 # CLI COMMANDS (NO CONVERT - system commands)
 # ============================================================================
@@ -183,6 +233,11 @@ GO_COMMANDS = [
     "go get", "go install", "go fmt", "go vet", "go generate"
 ]
 
+_ALL_COMMANDS = (
+    *GIT_COMMANDS, *NPM_COMMANDS, *YARN_COMMANDS, *PNPM_COMMANDS, *DOCKER_COMMANDS,
+    *KUBECTL_COMMANDS, *SYSTEM_COMMANDS, *PYTHON_COMMANDS, *RUST_COMMANDS, *GO_COMMANDS,
+)
+
 # ============================================================================
 # PROGRAMMING IDENTIFIERS (NO CONVERT - camelCase, snake_case)
 # ============================================================================
@@ -220,6 +275,8 @@ FILE_NAMES = [
     "pyproject.toml", "setup.py", "Gemfile", "Rakefile", "build.gradle", "pom.xml"
 ]
 
+_ALL_IDENTIFIERS = (*COMMON_IDENTIFIERS, *FILE_NAMES)
+
 # ============================================================================
 # VALID ENGLISH SENTENCES (stress tests - NO CONVERT)
 # ============================================================================
@@ -304,187 +361,175 @@ RUSSIAN_IT_PHRASES = [
     "восстанови базу", "проверь подключение", "обнови сертификат", "настрой прокси",
 ]
 
+RUSSIAN_UPPERCASE_WORDS = ["ПРИВЕТ", "СРОЧНО", "ВАЖНО", "ВНИМАНИЕ", "ОШИБКА", "ГОТОВО"]
+
+RUSSIAN_SHORT_WORDS = [
+    "в", "на", "из", "за", "по", "к", "у", "о", "и", "а", "но", "да",
+    "не", "ни", "бы", "ли", "же", "вот", "вон", "тут", "там", "где"
+]
+
+def _corrupt_all(*word_lists: List[str]) -> List[List[Tuple[str, str]]]:
+    """Corrupt several word lists with one translate pass over their concatenation.
+
+    Words are joined with '\n' (not part of the layout mapping), converted in a
+    single call and split back, so the whole batch costs one C-level loop.
+    """
+    flat = [w for words in word_lists for w in words]
+    corrupted = iter(convert_ru_to_en('\n'.join(flat)).split('\n'))
+    return [[(w, next(corrupted)) for w in words] for words in word_lists]
+
+# Corrupted forms are computed once at import as (word, corrupted) pairs,
+# so the generators below never re-run the per-character mapping.
+(_RU_WORDS_CORRUPTED, _RU_PHRASES_CORRUPTED,
+ _RU_UPPER_CORRUPTED, _RU_SHORT_CORRUPTED) = _corrupt_all(
+    RUSSIAN_COMMON_WORDS, RUSSIAN_IT_PHRASES, RUSSIAN_UPPERCASE_WORDS, RUSSIAN_SHORT_WORDS
+)
+
 # ============================================================================
 # GENERATOR FUNCTIONS
 # ============================================================================
 
+def next_counter(existing_ids: Set[str], prefix: str) -> int:
+    """Return the first counter after the highest existing f"{prefix}NNNN" id."""
+    max_counter = 0
+    for test_id in existing_ids:
+        if test_id.startswith(prefix):
+            suffix = test_id[len(prefix):]
+            if suffix.isdigit():
+                max_counter = max(max_counter, int(suffix))
+    return max_counter + 1
+
 def generate_company_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate tests for company/service names (should NOT convert)."""
-    tests = []
-    counter = 1
-
-    all_companies = (
-        TECH_GIANTS + CLOUD_PROVIDERS + DEV_TOOLS + AI_SERVICES +
-        DATABASES + FRAMEWORKS + RUSSIAN_SERVICES + CRYPTO_SERVICES +
-        SOCIAL_MEDIA + GAMING
-    )
-
-    for company in all_companies:
-        test_id = f"mega_company_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="companies_services",
-                input=company,
-                expected=company,
-                should_convert=False,
-                notes="Valid company/service name"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_company_")
+
+    tests = [None] * len(_ALL_COMPANIES)
+    for i, company in enumerate(_ALL_COMPANIES):
+        tests[i] = TestCase(
+            id=f"mega_company_{counter + i:04d}",
+            category="companies_services",
+            input=company,
+            expected=company,
+            should_convert=False
+        )
 
     return tests
 
 def generate_cli_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate tests for CLI commands (should NOT convert)."""
-    tests = []
-    counter = 1
-
-    all_commands = (
-        GIT_COMMANDS + NPM_COMMANDS + YARN_COMMANDS + PNPM_COMMANDS +
-        DOCKER_COMMANDS + KUBECTL_COMMANDS + SYSTEM_COMMANDS +
-        PYTHON_COMMANDS + RUST_COMMANDS + GO_COMMANDS
-    )
-
-    for cmd in all_commands:
-        test_id = f"mega_cli_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="cli_commands",
-                input=cmd,
-                expected=cmd,
-                should_convert=False,
-                notes="Valid CLI command"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_cli_")
+
+    tests = [None] * len(_ALL_COMMANDS)
+    for i, cmd in enumerate(_ALL_COMMANDS):
+        tests[i] = TestCase(
+            id=f"mega_cli_{counter + i:04d}",
+            category="cli_commands",
+            input=cmd,
+            expected=cmd,
+            should_convert=False
+        )
 
     return tests
 
 def generate_identifier_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate tests for programming identifiers (should NOT convert)."""
-    tests = []
-    counter = 1
-
-    for ident in COMMON_IDENTIFIERS + FILE_NAMES:
-        test_id = f"mega_ident_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="identifiers",
-                input=ident,
-                expected=ident,
-                should_convert=False,
-                notes="Valid identifier/filename"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_ident_")
+
+    tests = [None] * len(_ALL_IDENTIFIERS)
+    for i, ident in enumerate(_ALL_IDENTIFIERS):
+        tests[i] = TestCase(
+            id=f"mega_ident_{counter + i:04d}",
+            category="identifiers",
+            input=ident,
+            expected=ident,
+            should_convert=False
+        )
 
     return tests
 
 def generate_english_stress_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate valid English sentences that should NOT convert."""
-    tests = []
-    counter = 1
-
-    for sentence in VALID_ENGLISH_SENTENCES:
-        test_id = f"mega_en_stress_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="stress_tests_en",
-                input=sentence,
-                expected=sentence,
-                should_convert=False,
-                notes="Valid English sentence"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_en_stress_")
+
+    tests = [None] * len(VALID_ENGLISH_SENTENCES)
+    for i, sentence in enumerate(VALID_ENGLISH_SENTENCES):
+        tests[i] = TestCase(
+            id=f"mega_en_stress_{counter + i:04d}",
+            category="stress_tests_en",
+            input=sentence,
+            expected=sentence,
+            should_convert=False
+        )
 
     return tests
 
 def generate_russian_word_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate corrupted Russian words (should convert)."""
-    tests = []
-    counter = 1
-
-    for word in RUSSIAN_COMMON_WORDS:
-        corrupted = convert_ru_to_en(word)
-        test_id = f"mega_ru_word_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="ru_common_words",
-                input=corrupted,
-                expected=word,
-                should_convert=True,
-                notes="Corrupted Russian word"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_ru_word_")
+
+    tests = [None] * len(_RU_WORDS_CORRUPTED)
+    for i, (word, corrupted) in enumerate(_RU_WORDS_CORRUPTED):
+        tests[i] = TestCase(
+            id=f"mega_ru_word_{counter + i:04d}",
+            category="ru_common_words",
+            input=corrupted,
+            expected=word,
+            should_convert=True
+        )
 
     return tests
 
 def generate_russian_phrase_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate corrupted Russian IT phrases (should convert)."""
-    tests = []
-    counter = 1
-
-    for phrase in RUSSIAN_IT_PHRASES:
-        corrupted = convert_ru_to_en(phrase)
-        test_id = f"mega_ru_phrase_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="ru_phrases",
-                input=corrupted,
-                expected=phrase,
-                should_convert=True,
-                notes="Corrupted Russian IT phrase"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_ru_phrase_")
+
+    tests = [None] * len(_RU_PHRASES_CORRUPTED)
+    for i, (phrase, corrupted) in enumerate(_RU_PHRASES_CORRUPTED):
+        tests[i] = TestCase(
+            id=f"mega_ru_phrase_{counter + i:04d}",
+            category="ru_phrases",
+            input=corrupted,
+            expected=phrase,
+            should_convert=True
+        )
 
     return tests
 
 def generate_uppercase_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate uppercase variants."""
-    tests = []
-    counter = 1
-
-    # Corrupted Russian uppercase (should convert)
-    ru_upper_words = ["ПРИВЕТ", "СРОЧНО", "ВАЖНО", "ВНИМАНИЕ", "ОШИБКА", "ГОТОВО"]
-    for word in ru_upper_words:
-        corrupted = convert_ru_to_en(word)
-        test_id = f"mega_upper_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="uppercase",
-                input=corrupted,
-                expected=word,
-                should_convert=True,
-                notes="Corrupted Russian uppercase"
-            ))
-            counter += 1
+    counter = next_counter(existing_ids, "mega_upper_")
 
     # Valid English uppercase (should NOT convert)
     en_upper_words = ["API", "URL", "HTTP", "JSON", "HTML", "CSS", "SQL", "XML",
                       "README", "TODO", "FIXME", "NOTE", "WARNING", "ERROR"]
-    for word in en_upper_words:
-        test_id = f"mega_upper_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="uppercase",
-                input=word,
-                expected=word,
-                should_convert=False,
-                notes="Valid English uppercase"
-            ))
-            counter += 1
+
+    n_ru = len(_RU_UPPER_CORRUPTED)
+    tests = [None] * (n_ru + len(en_upper_words))
+
+    # Corrupted Russian uppercase (should convert)
+    for i, (word, corrupted) in enumerate(_RU_UPPER_CORRUPTED):
+        tests[i] = TestCase(
+            id=f"mega_upper_{counter + i:04d}",
+            category="uppercase",
+            input=corrupted,
+            expected=word,
+            should_convert=True
+        )
+
+    for i, word in enumerate(en_upper_words, n_ru):
+        tests[i] = TestCase(
+            id=f"mega_upper_{counter + i:04d}",
+            category="uppercase",
+            input=word,
+            expected=word,
+            should_convert=False
+        )
 
     return tests
 
 def generate_mixed_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate mixed language tests."""
-    tests = []
-    counter = 1
+    counter = next_counter(existing_ids, "mega_mixed_")
 
     # Code-switching examples (Russian + English terms)
     code_switch = [
@@ -498,68 +543,55 @@ def generate_mixed_tests(existing_ids: Set[str]) -> List[TestCase]:
         ("j,yjdb config", "обнови config"),
     ]
 
-    for corrupted, expected in code_switch:
-        test_id = f"mega_mixed_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="code_switching",
-                input=corrupted,
-                expected=expected,
-                should_convert=True,
-                notes="Code-switching RU+EN"
-            ))
-            counter += 1
+    tests = [None] * len(code_switch)
+    for i, (corrupted, expected) in enumerate(code_switch):
+        tests[i] = TestCase(
+            id=f"mega_mixed_{counter + i:04d}",
+            category="code_switching",
+            input=corrupted,
+            expected=expected,
+            should_convert=True
+        )
 
     return tests
 
 def generate_short_word_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate short word tests (1-3 chars)."""
     tests = []
-    counter = 1
+    append = tests.append
+    counter = next_counter(existing_ids, "mega_short_")
 
     # Russian prepositions/particles corrupted
-    ru_short = ["в", "на", "из", "за", "по", "к", "у", "о", "и", "а", "но", "да",
-                "не", "ни", "бы", "ли", "же", "вот", "вон", "тут", "там", "где"]
-
-    for word in ru_short:
-        corrupted = convert_ru_to_en(word)
+    for word, corrupted in _RU_SHORT_CORRUPTED:
         if len(corrupted) <= 3 and corrupted != word:
-            test_id = f"mega_short_{counter:04d}"
-            if test_id not in existing_ids:
-                tests.append(TestCase(
-                    id=test_id,
-                    category="short_words",
-                    input=corrupted,
-                    expected=word,
-                    should_convert=True,
-                    notes="Short Russian word corrupted"
-                ))
-                counter += 1
+            append(TestCase(
+                id=f"mega_short_{counter:04d}",
+                category="short_words",
+                input=corrupted,
+                expected=word,
+                should_convert=True
+            ))
+            counter += 1
 
     # Valid English short words (should NOT convert)
     en_short = ["a", "I", "on", "in", "at", "to", "of", "by", "is", "it",
                 "be", "do", "go", "no", "ok", "up", "us", "we", "if", "or"]
 
     for word in en_short:
-        test_id = f"mega_short_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="short_words",
-                input=word,
-                expected=word,
-                should_convert=False,
-                notes="Valid English short word"
-            ))
-            counter += 1
+        append(TestCase(
+            id=f"mega_short_{counter:04d}",
+            category="short_words",
+            input=word,
+            expected=word,
+            should_convert=False
+        ))
+        counter += 1
 
     return tests
 
 def generate_sensitive_tests(existing_ids: Set[str]) -> List[TestCase]:
     """Generate sensitive data tests (should NEVER convert)."""
-    tests = []
-    counter = 1
+    counter = next_counter(existing_ids, "mega_sensitive_")
 
     sensitive_patterns = [
         # URLs
@@ -595,29 +627,28 @@ def generate_sensitive_tests(existing_ids: Set[str]) -> List[TestCase]:
         "Bearer token_abc123",
     ]
 
-    for pattern in sensitive_patterns:
-        test_id = f"mega_sensitive_{counter:04d}"
-        if test_id not in existing_ids:
-            tests.append(TestCase(
-                id=test_id,
-                category="sensitive_data",
-                input=pattern,
-                expected=pattern,
-                should_convert=False,
-                notes="Sensitive data - never convert"
-            ))
-            counter += 1
+    tests = [None] * len(sensitive_patterns)
+    for i, pattern in enumerate(sensitive_patterns):
+        tests[i] = TestCase(
+            id=f"mega_sensitive_{counter + i:04d}",
+            category="sensitive_data",
+            input=pattern,
+            expected=pattern,
+            should_convert=False
+        )
 
     return tests
 
 def main():
     """Main function to generate and merge tests."""
+    import os
+    import sys
+
     corpus_path = "../test_corpus_v2.json"
 
     # Load existing tests
     if os.path.exists(corpus_path):
-        with open(corpus_path, 'r', encoding='utf-8') as f:
-            existing_tests = json.load(f)
+        existing_tests = load_corpus(corpus_path)
         print(f"Existing tests: {len(existing_tests)}")
     else:
         existing_tests = []
@@ -625,7 +656,8 @@ def main():
 
     # Track existing IDs and (input, expected) pairs for deduplication
     existing_ids = {t['id'] for t in existing_tests}
-    existing_pairs = {(t['input'], t['expected']) for t in existing_tests}
+    # Pairs are kept as hash((input, expected)) ints rather than string tuples
+    existing_pairs = {hash((t['input'], t['expected'])) for t in existing_tests}
 
     # Generate new tests
     all_new_tests = []
@@ -643,29 +675,32 @@ def main():
         ("Sensitive Data", generate_sensitive_tests),
     ]
 
+    add_pair = existing_pairs.add
     for name, generator in generators:
         tests = generator(existing_ids)
-        unique_tests = []
-        for t in tests:
-            pair = (t.input, t.expected)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                existing_ids.add(t.id)
-                unique_tests.append(t)
+        unique_tests = [t for t in tests
+                        if (h := hash((t.input, t.expected))) not in existing_pairs and not add_pair(h)]
         print(f"  {name}: {len(unique_tests)} unique tests")
         all_new_tests.extend(unique_tests)
 
     print(f"\nTotal new tests: {len(all_new_tests)}")
 
     # Merge with existing
-    merged = existing_tests + [asdict(t) for t in all_new_tests]
+    if '--notes' in sys.argv:
+        new_dicts = [{**t.as_dict, 'notes': notes_for(t.category, t.should_convert)}
+                     for t in all_new_tests]
+    else:
+        new_dicts = [t.as_dict for t in all_new_tests]
+    merged = existing_tests + new_dicts
 
-    # Save
-    with open(corpus_path, 'w', encoding='utf-8') as f:
-        json.dump(merged, f, ensure_ascii=False, indent=2)
+    # Save (compact; --pretty also writes an indented copy for diffing)
+    pretty_path = corpus_path.replace('.json', '.pretty.json') if '--pretty' in sys.argv else None
+    save_corpus(merged, corpus_path, pretty_path=pretty_path)
 
     print(f"\nTotal tests: {len(merged)}")
     print(f"Saved to: {os.path.abspath(corpus_path)}")
+    if pretty_path:
+        print(f"Pretty copy: {os.path.abspath(pretty_path)}")
 
     # Statistics
     should_convert = sum(1 for t in merged if t['should_convert'])
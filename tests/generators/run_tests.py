@@ -8,79 +8,204 @@ import json
 import os
 import subprocess
 import re
+import select
 import sys
+import threading
 from typing import List, Dict, Tuple
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from corpus_io import load_corpus
+
 CLI_PATH = "/Users/macbookpro/PycharmProjects/Dictum/build/Build/Products/Debug/TextSwitcherCLI"
 CORPUS_PATH = "../test_corpus_v2.json"
 
-@dataclass
+# CLI prints the final result as '  Выход: "<text>"'. One MULTILINE search over
+# the whole output: lines not starting with "Выход:" fail right after their
+# indentation, and [ \t] keeps every match on one line. The capture runs to the
+# last quote on the line because results can themselves contain quotes.
+_RE_VYHOD = re.compile(r'^[ \t]*Выход:[ \t]*"(.*)"[ \t]*$', re.MULTILINE)
+_RE_QUOTED = re.compile(r'"([^"\n]+)"')
+
+# First stdout line of `TextSwitcherCLI --batch`. A binary built before --batch
+# existed prints its banner instead, treating the flag as a test case
+BATCH_READY_MARKER = "TEXTSWITCHER_BATCH_READY"
+
+# Field names and order are the test_results.json schema: orjson serializes
+# the instances directly, with no intermediate dict per result
+@dataclass(slots=True)
 class TestResult:
     test_id: str
     category: str
-    input_text: str
+    input: str
     expected: str
     actual: str
     should_convert: bool
     passed: bool
     error: str = ""
 
-def run_cli(input_text: str, timeout: int = 5) -> Tuple[str, str]:
-    """Run TextSwitcherCLI with input and return (output, error)."""
+def run_cli(input_text: str, timeout: int = 5,
+            stderr_sink=subprocess.PIPE) -> Tuple[str, str]:
+    """Run TextSwitcherCLI with input and return (output, error).
+
+    Pass stderr_sink=subprocess.DEVNULL when the log is not needed; error is
+    then "" unless the run times out or fails to start.
+    """
     try:
         result = subprocess.run(
             [CLI_PATH, input_text],
-            capture_output=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr_sink,
             text=True,
             timeout=timeout
         )
-        return result.stdout, result.stderr
+        return result.stdout, result.stderr or ""
     except subprocess.TimeoutExpired:
         return "", "TIMEOUT"
     except Exception as e:
         return "", str(e)
 
+class BatchUnsupportedError(RuntimeError):
+    """The CLI did not answer --batch with BATCH_READY_MARKER."""
+
+class CLIWorker:
+    """Long-lived `TextSwitcherCLI --batch` process: one input line in, one result line out.
+
+    Replaces a fork+exec per test with two pipe writes; each runner thread owns one.
+    """
+
+    def __init__(self):
+        self.p = subprocess.Popen(
+            [CLI_PATH, '--batch'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,  # verbose per-word log
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        # Wait for the ready marker so an old binary's banner is never read back as results
+        ready, _, _ = select.select([self.p.stdout], [], [], 10)
+        first = self.p.stdout.readline().rstrip('\n') if ready else None
+        if first != BATCH_READY_MARKER:
+            self.close()
+            raise BatchUnsupportedError(
+                f"{CLI_PATH} does not support --batch (got {first!r} instead of "
+                f"{BATCH_READY_MARKER!r}); rebuild TextSwitcherCLI or pass --no-batch")
+
+    def run(self, input_text: str, timeout: int = 5) -> str:
+        """Convert one input; raises TimeoutError or RuntimeError if the worker is stuck or gone."""
+        # The protocol is line based, so embedded newlines cannot be sent as-is
+        self.p.stdin.write(input_text.replace('\n', ' ') + '\n')
+        self.p.stdin.flush()
+        ready, _, _ = select.select([self.p.stdout], [], [], timeout)
+        if not ready:
+            raise TimeoutError
+        line = self.p.stdout.readline()
+        if not line:
+            raise RuntimeError(f"CLI worker exited with code {self.p.poll()}")
+        return line.rstrip('\n')
+
+    def close(self):
+        if self.p.poll() is None:
+            self.p.kill()
+        self.p.wait()
+
+_local = threading.local()
+_workers: List[CLIWorker] = []
+_workers_lock = threading.Lock()
+
+def run_cli_batch(input_text: str, timeout: int = 5) -> Tuple[str, str]:
+    """Convert input on this thread's CLIWorker and return (result, error).
+
+    Raises BatchUnsupportedError if the CLI binary has no --batch mode.
+    """
+    worker = getattr(_local, 'worker', None)
+    try:
+        if worker is None:
+            worker = _local.worker = CLIWorker()
+            with _workers_lock:
+                _workers.append(worker)
+        return worker.run(input_text, timeout), ""
+    except BatchUnsupportedError:
+        raise
+    except TimeoutError:
+        error = "TIMEOUT"
+    except (OSError, RuntimeError) as e:
+        error = str(e)
+    # A stuck or dead worker is dropped; the next test on this thread starts a fresh one
+    if worker is not None:
+        worker.close()
+    _local.worker = None
+    return "", error
+
+def close_cli_workers():
+    """Stop all CLIWorker processes started by run_cli_batch."""
+    with _workers_lock:
+        for worker in _workers:
+            worker.close()
+        _workers.clear()
+
 def parse_cli_output(output: str) -> str:
     """Extract the converted result from CLI output."""
     # Look for line: "  Выход: "..."" or similar
-    lines = output.strip().split('\n')
-    for line in lines:
-        # Match pattern: Выход: "result"
-        match = re.search(r'Выход:\s*"(.+)"', line)
-        if match:
-            return match.group(1)
+    match = _RE_VYHOD.search(output)
+    if match:
+        return match.group(1)
 
     # Fallback: look for last non-empty line that looks like result
-    for line in reversed(lines):
+    for line in reversed(output.strip().split('\n')):
         line = line.strip()
         if line and not line.startswith('═') and not line.startswith('─') and not line.startswith('│'):
             # Try to extract from quotes
-            match = re.search(r'"([^"]+)"', line)
+            match = _RE_QUOTED.search(line)
             if match:
                 return match.group(1)
 
     return ""
 
-def run_single_test(test: Dict) -> TestResult:
-    """Run a single test and return result."""
+# Set once a CLIWorker fails the handshake; every later test runs one-shot
+_batch_unsupported = threading.Event()
+
+def run_single_test(test: Dict, batch: bool = True) -> TestResult:
+    """Run a single test and return result (via a CLIWorker unless batch is False
+    or the CLI has no --batch mode)."""
     test_id = test['id']
     category = test['category']
     input_text = test['input']
     expected = test['expected']
     should_convert = test['should_convert']
 
-    output, error = run_cli(input_text)
+    batch = batch and not _batch_unsupported.is_set()
+    if batch:
+        try:
+            actual, error = run_cli_batch(input_text)
+        except BatchUnsupportedError as e:
+            with _workers_lock:
+                if not _batch_unsupported.is_set():
+                    _batch_unsupported.set()
+                    print(f"\n  Warning: {e}\n  Falling back to one CLI process per test")
+            batch = False
+    if not batch:
+        # stderr only carries the CLI's log; skip the pipe for no-convert tests
+        sink = subprocess.PIPE if should_convert else subprocess.DEVNULL
+        output, error = run_cli(input_text, stderr_sink=sink)
+        actual = parse_cli_output(output)
 
     # stderr is just logs, not real errors - only check if output is empty
-    if not output and error == "TIMEOUT":
+    if not actual and error == "TIMEOUT":
         return TestResult(
             test_id=test_id,
             category=category,
-            input_text=input_text,
+            input=input_text,
             expected=expected,
             actual="",
             should_convert=should_convert,
@@ -88,8 +213,6 @@ def run_single_test(test: Dict) -> TestResult:
             error="TIMEOUT"
         )
 
-    actual = parse_cli_output(output)
-
     # Determine if test passed
     if should_convert:
         # Expected: input should be converted to expected
@@ -101,30 +224,38 @@ def run_single_test(test: Dict) -> TestResult:
     return TestResult(
         test_id=test_id,
         category=category,
-        input_text=input_text,
+        input=input_text,
         expected=expected,
         actual=actual,
         should_convert=should_convert,
         passed=passed
     )
 
-def run_batch_test(tests: List[Dict], batch_size: int = 100) -> List[TestResult]:
-    """Run tests in batches for progress reporting."""
-    results = []
+def run_batch_test(tests: List[Dict], batch_size: int = 100,
+                   workers: int = None, batch: bool = True) -> List[TestResult]:
+    """Run tests concurrently (one CLI worker per thread, or one CLI process per
+    test if batch is False), reporting progress every batch_size completions.
+    Results keep corpus order."""
     total = len(tests)
-
-    for i in range(0, total, batch_size):
-        batch = tests[i:i+batch_size]
-        for test in batch:
-            result = run_single_test(test)
-            results.append(result)
-
-        # Progress report
-        done = min(i + batch_size, total)
-        passed = sum(1 for r in results if r.passed)
-        accuracy = 100 * passed / len(results) if results else 0
-        print(f"\r  Progress: {done}/{total} ({100*done/total:.1f}%) | Accuracy: {accuracy:.2f}%", end='', flush=True)
-
+    results: List[TestResult] = [None] * total
+    done = 0
+    passed = 0
+
+    # The CLI runs in child processes, so threads only wait on pipes
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(run_single_test, test, batch): i for i, test in enumerate(tests)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            done += 1
+            passed += result.passed
+
+            # Progress report
+            if done % batch_size == 0 or done == total:
+                accuracy = 100 * passed / done
+                print(f"\r  Progress: {done}/{total} ({100*done/total:.1f}%) | Accuracy: {accuracy:.2f}%", end='', flush=True)
+
+    close_cli_workers()
     print()  # New line after progress
     return results
 
@@ -140,14 +271,15 @@ def main():
         sys.exit(1)
 
     # Load corpus
-    if not os.path.exists(CORPUS_PATH):
-        print(f"Error: Corpus not found at {CORPUS_PATH}")
+    corpus_path = CORPUS_PATH
+    if not os.path.exists(corpus_path):
+        print(f"Error: Corpus not found at {corpus_path}")
         sys.exit(1)
 
-    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
-        tests = json.load(f)
+    tests = load_corpus(corpus_path)
 
     print(f"\n  Total tests: {len(tests):,}")
+    print(f"  Corpus: {corpus_path}")
     print(f"  CLI: {CLI_PATH}")
     print()
 
@@ -165,16 +297,24 @@ def main():
     else:
         print(f"  Running ALL {len(tests):,} tests (this may take a while)...")
         print(f"  Tip: Use --sample for 500 random tests, --quick for first 100")
+        print(f"       (--no-batch spawns one CLI process per test instead of --batch workers,")
+        print(f"        --pretty indents test_results.json)")
 
     print()
 
     # Run tests
     start_time = time.time()
-    results = run_batch_test(tests)
+    results = run_batch_test(tests, batch='--no-batch' not in sys.argv)
     elapsed = time.time() - start_time
 
-    # Calculate statistics
-    passed = sum(1 for r in results if r.passed)
+    # Calculate statistics (per-category counts in the same single pass)
+    cat_totals = Counter()
+    cat_passed = Counter()
+    cat_failed = Counter()
+    for r in results:
+        cat_totals[r.category] += 1
+        (cat_passed if r.passed else cat_failed)[r.category] += 1
+    passed = sum(cat_passed.values())
     failed = len(results) - passed
     accuracy = 100 * passed / len(results) if results else 0
 
@@ -190,11 +330,8 @@ def main():
     # Category breakdown for failures
     if failed > 0:
         print(f"\n  Failures by category:")
-        failures_by_cat = Counter(r.category for r in results if not r.passed)
-        for cat, count in failures_by_cat.most_common(10):
-            cat_total = sum(1 for r in results if r.category == cat)
-            cat_passed = sum(1 for r in results if r.category == cat and r.passed)
-            cat_accuracy = 100 * cat_passed / cat_total if cat_total else 0
+        for cat, count in cat_failed.most_common(10):
+            cat_accuracy = 100 * cat_passed[cat] / cat_totals[cat]
             print(f"    {cat}: {count} failed ({cat_accuracy:.1f}% accuracy)")
 
         # Show sample failures
@@ -203,7 +340,7 @@ def main():
         for r in failures:
             convert_str = "CONVERT" if r.should_convert else "NO CONV"
             print(f"    [{r.category}] [{convert_str}]")
-            print(f"      Input:    '{r.input_text}'")
+            print(f"      Input:    '{r.input}'")
             print(f"      Expected: '{r.expected}'")
             print(f"      Actual:   '{r.actual}'")
             if r.error:
@@ -212,22 +349,16 @@ def main():
 
     # Save detailed results
     results_file = "../test_results.json"
-    results_data = [
-        {
-            'test_id': r.test_id,
-            'category': r.category,
-            'input': r.input_text,
-            'expected': r.expected,
-            'actual': r.actual,
-            'should_convert': r.should_convert,
-            'passed': r.passed,
-            'error': r.error
-        }
-        for r in results
-    ]
-
-    with open(results_file, 'w', encoding='utf-8') as f:
-        json.dump(results_data, f, ensure_ascii=False, indent=2)
+    # Compact by default; --pretty writes an indented file for reading/diffing
+    if '--pretty' in sys.argv:
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=asdict)
+    elif orjson is not None:
+        with open(results_file, 'wb') as f:
+            f.write(orjson.dumps(results))
+    else:
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, separators=(',', ':'), default=asdict)
 
     print(f"\n  Detailed results saved to: {results_file}")
     print("═" * 70)
@@ -3,10 +3,17 @@
 Validate test corpus quality and check for issues.
 """
 
-import json
 import os
-from collections import Counter
-from typing import List, Dict, Set, Tuple
+import random
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple
+
+from corpus_io import load_corpus
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # QWERTY to ЙЦУКЕН mapping for validation
 QWERTY_TO_RUSSIAN = {
@@ -18,28 +25,61 @@ QWERTY_TO_RUSSIAN = {
 
 RUSSIAN_TO_QWERTY = {v: k for k, v in QWERTY_TO_RUSSIAN.items()}
 
-def is_cyrillic(char: str) -> bool:
-    """Check if character is Cyrillic."""
-    return '\u0400' <= char <= '\u04FF' or char == 'ё' or char == 'Ё'
-
-def is_latin(char: str) -> bool:
-    """Check if character is Latin."""
-    return char.isalpha() and char.isascii()
+_PUNCT_CHARS = '.,!?;:\'"-()[]{}/<>@#$%^&*+=~`|\\'
+_PUNCT = frozenset(_PUNCT_CHARS)
+_SPACE = frozenset(' \t\n')
+
+# Below this length NumPy's per-call setup costs more than the Python loop
+_NUMPY_MIN_LEN = 32
+
+if np is not None:
+    _PUNCT_LUT = np.zeros(128, dtype=bool)
+    _PUNCT_LUT[[ord(c) for c in _PUNCT_CHARS]] = True
+
+def _analyze_text_numpy(text: str) -> Dict[str, int]:
+    """Vectorized analyze_text over the text's codepoints; same counts."""
+    cps = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    is_ascii = cps < 0x80
+    cyrillic = (cps >= 0x0400) & (cps <= 0x04FF)
+    folded = cps | 0x20  # ASCII A-Z -> a-z; nothing >= 0x80 lands in a-z
+    latin = (folded >= 0x61) & (folded <= 0x7A)
+    digit = (cps >= 0x30) & (cps <= 0x39)
+    space = (cps == 0x20) | (cps == 0x09) | (cps == 0x0A)
+    punct = np.zeros_like(is_ascii)
+    punct[is_ascii] = _PUNCT_LUT[cps[is_ascii]]
+
+    result = {
+        'cyrillic': int(np.count_nonzero(cyrillic)),
+        'latin': int(np.count_nonzero(latin)),
+        'digit': int(np.count_nonzero(digit)),
+        'punct': int(np.count_nonzero(punct)),
+        'space': int(np.count_nonzero(space)),
+        'other': int(np.count_nonzero(is_ascii & ~(latin | digit | space | punct))),
+    }
+    # Non-ASCII, non-Cyrillic chars are rare; str.isdigit() still decides
+    # whether they count as digits (e.g. '²', Arabic-Indic digits)
+    for cp in cps[~is_ascii & ~cyrillic].tolist():
+        result['digit' if chr(cp).isdigit() else 'other'] += 1
+    return result
 
 def analyze_text(text: str) -> Dict[str, int]:
     """Analyze character types in text."""
+    if np is not None and len(text) >= _NUMPY_MIN_LEN:
+        return _analyze_text_numpy(text)
+
     result = {'cyrillic': 0, 'latin': 0, 'digit': 0, 'punct': 0, 'space': 0, 'other': 0}
     for char in text:
-        if is_cyrillic(char):
+        o = ord(char)
+        if 0x0400 <= o <= 0x04FF:  # Cyrillic block, includes ё/Ё
             result['cyrillic'] += 1
-        elif is_latin(char):
+        elif 0x61 <= (o | 0x20) <= 0x7A:  # | 0x20 folds A-Z onto a-z; only ASCII can land here
             result['latin'] += 1
-        elif char.isdigit():
-            result['digit'] += 1
-        elif char in ' \t\n':
+        elif char in _SPACE:
             result['space'] += 1
-        elif char in '.,!?;:\'"-()[]{}/<>@#$%^&*+=~`|\\':
+        elif char in _PUNCT:
             result['punct'] += 1
+        elif 0x30 <= o <= 0x39 or (o > 0x7F and char.isdigit()):
+            result['digit'] += 1
         else:
             result['other'] += 1
     return result
@@ -71,23 +111,9 @@ def validate_conversion(test: Dict) -> Tuple[bool, str]:
 
     return True, "OK"
 
-def check_duplicates(tests: List[Dict]) -> List[Tuple[str, str]]:
-    """Find duplicate (input, expected) pairs."""
-    seen = {}
-    duplicates = []
-    for t in tests:
-        pair = (t['input'], t['expected'])
-        if pair in seen:
-            duplicates.append(pair)
-        else:
-            seen[pair] = t['id']
-    return duplicates
-
-def sample_tests(tests: List[Dict], category: str, n: int = 5) -> List[Dict]:
-    """Sample n tests from a category."""
-    cat_tests = [t for t in tests if t['category'] == category]
-    import random
-    random.seed(42)
+def sample_tests(tests_by_cat: Dict[str, List[Dict]], category: str, n: int = 5) -> List[Dict]:
+    """Sample n tests from a category (seed the RNG once before the first call)."""
+    cat_tests = tests_by_cat.get(category, [])
     return random.sample(cat_tests, min(n, len(cat_tests)))
 
 def main():
@@ -97,30 +123,49 @@ def main():
         print(f"Error: {corpus_path} not found")
         return
 
-    with open(corpus_path, 'r', encoding='utf-8') as f:
-        tests = json.load(f)
+    tests = load_corpus(corpus_path)
 
     print(f"=" * 60)
     print(f"TEST CORPUS VALIDATION REPORT")
     print(f"=" * 60)
     print(f"\nTotal tests: {len(tests):,}")
 
+    # One pass over the corpus gathers everything the report needs
+    should_convert = 0
+    categories = Counter()
+    tests_by_cat = defaultdict(list)
+    seen = set()
+    duplicates = []
+    issues = []
+    for t in tests:
+        if t['should_convert']:
+            should_convert += 1
+        category = t['category']
+        categories[category] += 1
+        tests_by_cat[category].append(t)
+        pair = (t['input'], t['expected'])
+        key = hash(pair)  # only membership matters, so keep pair hashes
+        if key in seen:
+            duplicates.append(pair)
+        else:
+            seen.add(key)
+        valid, msg = validate_conversion(t)
+        if not valid:
+            issues.append((t['id'], msg))
+
     # Statistics
-    should_convert = sum(1 for t in tests if t['should_convert'])
     should_not = len(tests) - should_convert
     print(f"\nConversion balance:")
     print(f"  Should convert: {should_convert:,} ({100*should_convert/len(tests):.1f}%)")
     print(f"  Should NOT convert: {should_not:,} ({100*should_not/len(tests):.1f}%)")
 
     # Category breakdown
-    categories = Counter(t['category'] for t in tests)
     print(f"\nCategories ({len(categories)} total):")
     for cat, count in categories.most_common():
         pct = 100 * count / len(tests)
         print(f"  {cat}: {count:,} ({pct:.1f}%)")
 
-    # Check for duplicates
-    duplicates = check_duplicates(tests)
+    # Duplicates
     print(f"\nDuplicates: {len(duplicates)}")
     if duplicates:
         print("  First 5 duplicates:")
@@ -129,12 +174,6 @@ def main():
 
     # Validation checks
     print(f"\nValidation checks:")
-    issues = []
-    for t in tests:
-        valid, msg = validate_conversion(t)
-        if not valid:
-            issues.append((t['id'], msg))
-
     print(f"  Issues found: {len(issues)}")
     if issues:
         print("  First 10 issues:")
@@ -157,8 +196,9 @@ def main():
         'sensitive_data',
     ]
 
+    random.seed(42)
     for cat in key_categories:
-        samples = sample_tests(tests, cat, 3)
+        samples = sample_tests(tests_by_cat, cat, 3)
         if samples:
             print(f"\n{cat} ({categories.get(cat, 0)} tests):")
             for s in samples:
@@ -2,13 +2,28 @@
 """
 Wordlist-based test generator - generates tests from frequency wordlists.
 Creates variants: uppercase, with punctuation, in sentences, etc.
+
+Usage:
+    python wordlist_generator.py            # merge new tests into ../test_corpus_v2.json
+    python wordlist_generator.py --ndjson   # also write ../test_corpus_v2.ndjson
+    python wordlist_generator.py --pretty   # also write ../test_corpus_v2.pretty.json
 """
 
-import json
+import hashlib
+import math
 import os
 import random
 from dataclasses import dataclass, asdict
-from typing import List, Set, Tuple
+from functools import lru_cache
+from itertools import product
+from typing import Iterator, List
+
+from corpus_io import load_corpus, save_corpus
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 # QWERTY to ЙЦУКЕН mapping
 QWERTY_TO_RUSSIAN = {
@@ -24,6 +39,9 @@ QWERTY_TO_RUSSIAN = {
 
 RUSSIAN_TO_QWERTY = {v: k for k, v in QWERTY_TO_RUSSIAN.items()}
 
+# Every entry is char-to-char, so conversion is one C-level str.translate pass
+_RU_TO_EN_TRANS = str.maketrans({k: v for k, v in RUSSIAN_TO_QWERTY.items() if len(k) == 1 and len(v) == 1})
+
 @dataclass
 class TestCase:
     id: str
@@ -33,8 +51,54 @@ class TestCase:
     should_convert: bool
     notes: str = ""
 
+# The sentence/number/bracket generators corrupt the same few hundred words
+# over and over; cache per word and build combinations from the pieces
+@lru_cache(maxsize=4096)
 def convert_ru_to_en(text: str) -> str:
-    return ''.join(RUSSIAN_TO_QWERTY.get(c, c) for c in text)
+    return text.translate(_RU_TO_EN_TRANS)
+
+def pair_key(input_text: str, expected: str) -> int:
+    """64-bit digest of an (input, expected) pair for the dedup filter.
+
+    At ~10^5 pairs the chance of a 64-bit collision is negligible.
+    """
+    data = f"{input_text}\x00{expected}".encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+class PairBloomFilter:
+    """Fixed-size Bloom filter over pair_key() digests.
+
+    Dedup only asks "seen before?", so bits stand in for a set of keys. A false
+    positive just skips one generated test. Few probes keep add/lookup cheap in
+    Python at the cost of more bits per item than the theoretical optimum.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6, hashes: int = 4):
+        bits_per_item = -hashes / math.log(1 - error_rate ** (1 / hashes))
+        self.size = max(64, math.ceil(capacity * bits_per_item))
+        self.hashes = hashes
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: int) -> List[int]:
+        # Double hashing: the two halves of the 64-bit key give all probes
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: int) -> None:
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: int) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+# Headroom for pairs the generators add on top of the existing corpus
+# (about 14k with the current wordlists)
+NEW_PAIRS_CAPACITY = 50_000
 
 def load_wordlist(filename: str) -> List[str]:
     """Load words from a wordlist file."""
@@ -60,9 +124,8 @@ def load_wordlist(filename: str) -> List[str]:
                 words.append(line)
     return words
 
-def generate_ru_word_variants(words: List[str], existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_ru_word_variants(words: List[str], existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate variants of Russian words."""
-    tests = []
     counter = 1
 
     for word in words[:1000]:  # Top 1000 words
@@ -75,96 +138,90 @@ def generate_ru_word_variants(words: List[str], existing_pairs: Set[Tuple[str, s
         if corrupted == word:
             continue
 
-        pair = (corrupted, word)
-        if pair not in existing_pairs:
-            existing_pairs.add(pair)
-            tests.append(TestCase(
+        key = pair_key(corrupted, word)
+        if key not in existing_pairs:
+            existing_pairs.add(key)
+            yield TestCase(
                 id=f"wl_ru_{counter:05d}",
                 category="ru_common_words",
                 input=corrupted,
                 expected=word,
                 should_convert=True,
                 notes=f"Russian word #{counter}"
-            ))
+            )
             counter += 1
 
         # Uppercase variant
         word_upper = word.upper()
         corrupted_upper = convert_ru_to_en(word_upper)
-        pair = (corrupted_upper, word_upper)
-        if pair not in existing_pairs and corrupted_upper != word_upper:
-            existing_pairs.add(pair)
-            tests.append(TestCase(
+        key = pair_key(corrupted_upper, word_upper)
+        if key not in existing_pairs and corrupted_upper != word_upper:
+            existing_pairs.add(key)
+            yield TestCase(
                 id=f"wl_ru_{counter:05d}",
                 category="uppercase",
                 input=corrupted_upper,
                 expected=word_upper,
                 should_convert=True,
                 notes=f"Russian word uppercase"
-            ))
+            )
             counter += 1
 
         # With punctuation variants
         for punct in ['.', ',', '!', '?', ':', ';']:
             word_punct = word + punct
             corrupted_punct = convert_ru_to_en(word) + punct
-            pair = (corrupted_punct, word_punct)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                tests.append(TestCase(
+            key = pair_key(corrupted_punct, word_punct)
+            if key not in existing_pairs:
+                existing_pairs.add(key)
+                yield TestCase(
                     id=f"wl_ru_{counter:05d}",
                     category="punctuation",
                     input=corrupted_punct,
                     expected=word_punct,
                     should_convert=True,
                     notes=f"Russian word with {punct}"
-                ))
+                )
                 counter += 1
 
-    return tests
-
-def generate_en_stress_tests(words: List[str], existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_en_stress_tests(words: List[str], existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate English word stress tests (should NOT convert)."""
-    tests = []
     counter = 1
 
     for word in words[:1500]:  # Top 1500 words
         if len(word) < 2:
             continue
 
-        pair = (word, word)
-        if pair not in existing_pairs:
-            existing_pairs.add(pair)
-            tests.append(TestCase(
+        key = pair_key(word, word)
+        if key not in existing_pairs:
+            existing_pairs.add(key)
+            yield TestCase(
                 id=f"wl_en_{counter:05d}",
                 category="stress_tests_en",
                 input=word,
                 expected=word,
                 should_convert=False,
                 notes=f"Valid English word #{counter}"
-            ))
+            )
             counter += 1
 
         # Uppercase variant
         word_upper = word.upper()
-        pair = (word_upper, word_upper)
-        if pair not in existing_pairs and len(word_upper) >= 2:
-            existing_pairs.add(pair)
-            tests.append(TestCase(
+        key = pair_key(word_upper, word_upper)
+        if key not in existing_pairs and len(word_upper) >= 2:
+            existing_pairs.add(key)
+            yield TestCase(
                 id=f"wl_en_{counter:05d}",
                 category="stress_tests_en",
                 input=word_upper,
                 expected=word_upper,
                 should_convert=False,
                 notes=f"Valid English word uppercase"
-            ))
+            )
             counter += 1
 
-    return tests
-
-def generate_sentence_tests(ru_words: List[str], existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_sentence_tests(ru_words: List[str], existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate sentence-like combinations."""
-    tests = []
     counter = 1
 
     # Filter to get useful words
@@ -174,52 +231,50 @@ def generate_sentence_tests(ru_words: List[str], existing_pairs: Set[Tuple[str,
     adjectives = ['новый', 'старый', 'большой', 'маленький', 'хороший', 'плохой',
                   'красивый', 'быстрый', 'медленный', 'важный', 'простой', 'сложный']
 
-    # Two-word combinations
-    for word1 in nouns[:50]:
-        for word2 in nouns[:30]:
-            if word1 != word2:
-                sentence = f"{word1} {word2}"
-                corrupted = convert_ru_to_en(sentence)
-                pair = (corrupted, sentence)
-                if pair not in existing_pairs:
-                    existing_pairs.add(pair)
-                    tests.append(TestCase(
-                        id=f"wl_sent_{counter:05d}",
-                        category="sentences",
-                        input=corrupted,
-                        expected=sentence,
-                        should_convert=True,
-                        notes="Two Russian words"
-                    ))
-                    counter += 1
-                    if counter > 1000:
-                        break
-        if counter > 1000:
-            break
+    # (word, corrupted) pairs, converted once and reused by both loops
+    noun_pairs = [(w, convert_ru_to_en(w)) for w in nouns[:50]]
+    adj_pairs = [(w, convert_ru_to_en(w)) for w in adjectives[:10]]
 
-    # Adjective + Noun combinations
-    for adj in adjectives[:10]:
-        for noun in nouns[:50]:
-            sentence = f"{adj} {noun}"
-            corrupted = convert_ru_to_en(sentence)
-            pair = (corrupted, sentence)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                tests.append(TestCase(
-                    id=f"wl_sent_{counter:05d}",
-                    category="sentences",
-                    input=corrupted,
-                    expected=sentence,
-                    should_convert=True,
-                    notes="Adjective + Noun"
-                ))
-                counter += 1
+    # Two-word combinations (stop once 1000 have been added)
+    for (word1, cor1), (word2, cor2) in product(noun_pairs, noun_pairs[:30]):
+        if word1 == word2:
+            continue
+        sentence = f"{word1} {word2}"
+        corrupted = f"{cor1} {cor2}"
+        key = pair_key(corrupted, sentence)
+        if key not in existing_pairs:
+            existing_pairs.add(key)
+            yield TestCase(
+                id=f"wl_sent_{counter:05d}",
+                category="sentences",
+                input=corrupted,
+                expected=sentence,
+                should_convert=True,
+                notes="Two Russian words"
+            )
+            counter += 1
+            if counter > 1000:
+                break
 
-    return tests
+    # Adjective + Noun combinations
+    for (adj, cor_adj), (noun, cor_noun) in product(adj_pairs, noun_pairs):
+        sentence = f"{adj} {noun}"
+        corrupted = f"{cor_adj} {cor_noun}"
+        key = pair_key(corrupted, sentence)
+        if key not in existing_pairs:
+            existing_pairs.add(key)
+            yield TestCase(
+                id=f"wl_sent_{counter:05d}",
+                category="sentences",
+                input=corrupted,
+                expected=sentence,
+                should_convert=True,
+                notes="Adjective + Noun"
+            )
+            counter += 1
 
-def generate_number_mixed_tests(ru_words: List[str], existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_number_mixed_tests(ru_words: List[str], existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate number + word combinations."""
-    tests = []
     counter = 1
 
     numbers = ['1', '2', '3', '5', '10', '100', '2024', '2025']
@@ -230,40 +285,37 @@ def generate_number_mixed_tests(ru_words: List[str], existing_pairs: Set[Tuple[s
             # Number + word (Russian)
             combo = f"{num}{word}"
             corrupted = num + convert_ru_to_en(word)
-            pair = (corrupted, combo)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                tests.append(TestCase(
+            key = pair_key(corrupted, combo)
+            if key not in existing_pairs:
+                existing_pairs.add(key)
+                yield TestCase(
                     id=f"wl_num_{counter:05d}",
                     category="numbers_mixed",
                     input=corrupted,
                     expected=combo,
                     should_convert=True,
                     notes="Number + Russian word"
-                ))
+                )
                 counter += 1
 
             # Word + number (Russian)
             combo = f"{word}{num}"
             corrupted = convert_ru_to_en(word) + num
-            pair = (corrupted, combo)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                tests.append(TestCase(
+            key = pair_key(corrupted, combo)
+            if key not in existing_pairs:
+                existing_pairs.add(key)
+                yield TestCase(
                     id=f"wl_num_{counter:05d}",
                     category="numbers_mixed",
                     input=corrupted,
                     expected=combo,
                     should_convert=True,
                     notes="Russian word + number"
-                ))
+                )
                 counter += 1
 
-    return tests
-
-def generate_brackets_tests(ru_words: List[str], existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_brackets_tests(ru_words: List[str], existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate words with brackets/parentheses."""
-    tests = []
     counter = 1
 
     brackets = [('(', ')'), ('[', ']'), ('"', '"'), ("'", "'")]
@@ -274,24 +326,21 @@ def generate_brackets_tests(ru_words: List[str], existing_pairs: Set[Tuple[str,
             # Word in brackets
             bracketed = f"{open_br}{word}{close_br}"
             corrupted = f"{open_br}{convert_ru_to_en(word)}{close_br}"
-            pair = (corrupted, bracketed)
-            if pair not in existing_pairs:
-                existing_pairs.add(pair)
-                tests.append(TestCase(
+            key = pair_key(corrupted, bracketed)
+            if key not in existing_pairs:
+                existing_pairs.add(key)
+                yield TestCase(
                     id=f"wl_br_{counter:05d}",
                     category="punctuation",
                     input=corrupted,
                     expected=bracketed,
                     should_convert=True,
                     notes=f"Russian word in {open_br}{close_br}"
-                ))
+                )
                 counter += 1
 
-    return tests
-
-def generate_repeated_char_tests(existing_pairs: Set[Tuple[str, str]]) -> List[TestCase]:
+def generate_repeated_char_tests(existing_pairs: PairBloomFilter) -> Iterator[TestCase]:
     """Generate tests with repeated characters (typos)."""
-    tests = []
     counter = 1
 
     # Russian words with common typo patterns
@@ -305,44 +354,45 @@ def generate_repeated_char_tests(existing_pairs: Set[Tuple[str, str]]) -> List[T
 
     for word, expected in words_with_typos:
         corrupted = convert_ru_to_en(word)
-        pair = (corrupted, expected)
-        if pair not in existing_pairs:
-            existing_pairs.add(pair)
-            tests.append(TestCase(
+        key = pair_key(corrupted, expected)
+        if key not in existing_pairs:
+            existing_pairs.add(key)
+            yield TestCase(
                 id=f"wl_typo_{counter:05d}",
                 category="edge_cases",
                 input=corrupted,
                 expected=expected,
                 should_convert=True,
                 notes="Repeated characters"
-            ))
+            )
             counter += 1
 
-    return tests
 
 def main():
     """Main function."""
+    import sys
+
     corpus_path = "../test_corpus_v2.json"
+    ndjson_path = "../test_corpus_v2.ndjson" if '--ndjson' in sys.argv else None
+    pretty_path = "../test_corpus_v2.pretty.json" if '--pretty' in sys.argv else None
 
     # Load existing tests
     if os.path.exists(corpus_path):
-        with open(corpus_path, 'r', encoding='utf-8') as f:
-            existing_tests = json.load(f)
+        existing_tests = load_corpus(corpus_path)
         print(f"Existing tests: {len(existing_tests)}")
     else:
         existing_tests = []
         print("No existing corpus found")
 
-    existing_pairs = {(t['input'], t['expected']) for t in existing_tests}
+    existing_pairs = PairBloomFilter(len(existing_tests) + NEW_PAIRS_CAPACITY)
+    for t in existing_tests:
+        existing_pairs.add(pair_key(t['input'], t['expected']))
 
     # Load wordlists
     ru_words = load_wordlist("ru_top_2000.txt")
     en_words = load_wordlist("en_top_2000.txt")
     print(f"Loaded {len(ru_words)} Russian words, {len(en_words)} English words")
 
-    # Generate tests
-    all_new_tests = []
-
     generators = [
         ("Russian word variants", lambda: generate_ru_word_variants(ru_words, existing_pairs)),
         ("English stress tests", lambda: generate_en_stress_tests(en_words, existing_pairs)),
@@ -352,35 +402,49 @@ def main():
         ("Repeated chars", lambda: generate_repeated_char_tests(existing_pairs)),
     ]
 
-    for name, gen_func in generators:
-        tests = gen_func()
-        print(f"  {name}: {len(tests)} tests")
-        all_new_tests.extend(tests)
-
-    print(f"\nTotal new tests: {len(all_new_tests)}")
-
-    # Merge
-    merged = existing_tests + [asdict(t) for t in all_new_tests]
-
-    # Save
-    with open(corpus_path, 'w', encoding='utf-8') as f:
-        json.dump(merged, f, ensure_ascii=False, indent=2)
-
-    print(f"\nTotal tests: {len(merged)}")
+    # Stats are tallied as the merged corpus streams out: existing tests are
+    # copied through and new ones written as the generators yield them, so
+    # neither the merged list nor the new tests are ever held in memory.
+    should_convert = 0
+    categories = {}
+    new_count = 0
+
+    def merged():
+        nonlocal should_convert, new_count
+        for t in existing_tests:
+            should_convert += t['should_convert']
+            categories[t['category']] = categories.get(t['category'], 0) + 1
+            yield t
+
+        for name, gen_func in generators:
+            count = 0
+            for test in gen_func():
+                should_convert += test.should_convert
+                categories[test.category] = categories.get(test.category, 0) + 1
+                count += 1
+                yield asdict(test)
+            print(f"  {name}: {count} tests")
+            new_count += count
+
+    # save_corpus writes to a temp file and replaces the corpus only once
+    # every generator has finished
+    total = save_corpus(merged(), corpus_path, ndjson_path, pretty_path)
+    print(f"\nTotal new tests: {new_count}")
+
+    print(f"\nTotal tests: {total}")
     print(f"Saved to: {os.path.abspath(corpus_path)}")
+    if ndjson_path:
+        print(f"NDJSON copy: {os.path.abspath(ndjson_path)}")
+    if pretty_path:
+        print(f"Pretty copy: {os.path.abspath(pretty_path)}")
 
     # Statistics
-    should_convert = sum(1 for t in merged if t['should_convert'])
-    should_not = len(merged) - should_convert
+    should_not = total - should_convert
     print(f"\nStatistics:")
-    print(f"  Should convert: {should_convert} ({100*should_convert/len(merged):.1f}%)")
-    print(f"  Should NOT convert: {should_not} ({100*should_not/len(merged):.1f}%)")
+    print(f"  Should convert: {should_convert} ({100*should_convert/total:.1f}%)")
+    print(f"  Should NOT convert: {should_not} ({100*should_not/total:.1f}%)")
 
     # Category breakdown
-    categories = {}
-    for t in merged:
-        cat = t['category']
-        categories[cat] = categories.get(cat, 0) + 1
     print(f"\nCategory breakdown:")
     for cat, count in sorted(categories.items(), key=lambda x: -x[1]):
         print(f"  {cat}: {count}")
@@ -2,41 +2,106 @@
 """
 TextSwitcher Validation Script
 Запускает CLI тесты и генерирует отчёт
+
+Usage:
+    python validate_textswitcher.py              # с кэшем выходов CLI (results/.cli_cache.json)
+    python validate_textswitcher.py --no-cache   # весь корпус заново через CLI
 """
 
+import asyncio
+import csv
+import hashlib
 import json
 import subprocess
 import os
+import re
+import select
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Пути
 PROJECT_DIR = Path(__file__).parent.parent
 CLI_PATH = PROJECT_DIR / "build" / "Build" / "Products" / "Debug" / "TextSwitcherCLI"
 CORPUS_PATH = PROJECT_DIR / "tests" / "test_corpus.json"
 RESULTS_DIR = PROJECT_DIR / "tests" / "results"
-
-
+# Пользовательские списки ForcedConversions/UserExceptions, которые CLI читает через HybridValidator
+USER_DATA_DIR = Path.home() / "Library" / "Application Support" / "Dictum"
+
+# Сколько секунд CLI может думать над одним входом (и в разовом запуске, и в --batch)
+CLI_TIMEOUT = 10
+# Параллельные запуски CLI — оставляем пару ядер системе
+MAX_WORKERS = max(1, (os.cpu_count() or 1) - 2)
+# На меньших корпусах сборка массивов NumPy дороже обычного цикла
+_NUMPY_MIN_TESTS = 1000
+# Меньше входов на шард не даём — иначе запуск процесса дороже самой работы
+MIN_SHARD_SIZE = 100
+
+# Строка вывода CLI: Выход: "текст" — берём всё до последней кавычки в строке,
+# т.к. результат сам может содержать кавычки; пустой результат не считается.
+# Ищем по байтам stdout, декодируем только найденный результат
+_OUT_RE = re.compile('Выход:[ \t]*"(.+)"'.encode('utf-8'))
+
+# Первая строка stdout у `CLI --batch`; бинарник без batch-режима вместо неё
+# печатает баннер, приняв флаг за тест-кейс
+BATCH_READY_MARKER = b'TEXTSWITCHER_BATCH_READY'
+
+# Символы без маппинга в обе стороны — копия LayoutMaps.commonPunctuation.
+# Остальные знаки (/ ? @ # $ ^ & ; , . и т.п.) раскладка переводит
+_UNMAPPED_CHARS = frozenset('!%*()-_+=\\| \t\n0123456789')
+
+
+# Запись об упавшем тесте; порядок полей — колонки CSV и ключи в results_*.json
+@dataclass(slots=True)
+class TestError:
+    id: str
+    category: str
+    input: str
+    expected: str
+    actual: str
+    error_type: str
+
+
+def nothing_to_convert(text: str) -> bool:
+    """True, если CLI заведомо вернёт текст как есть: он пуст или состоит только
+    из символов, которые LayoutMaps не переводит ни в одну сторону (цифры,
+    пробелы, ! % * ( ) - _ + = \\ |).
+
+    should_convert тут не учитываем: ASCII-текст без кириллицы CLI вполне может
+    ошибочно сконвертировать, и такой false positive тест обязан поймать.
+    """
+    return all(c in _UNMAPPED_CHARS for c in text)
+
+
+@lru_cache(maxsize=None)
 def run_cli(text: str) -> str:
     """Запускает CLI и возвращает результат конвертации"""
+    if nothing_to_convert(text):
+        return text
     try:
         result = subprocess.run(
             [str(CLI_PATH), text],
             capture_output=True,
-            text=True,
-            timeout=10
+            timeout=CLI_TIMEOUT
         )
         # Парсим вывод CLI — ищем строку "Выход:"
-        for line in result.stdout.split('\n'):
-            if 'Выход:' in line:
-                # Выход: "текст"
-                start = line.find('"') + 1
-                end = line.rfind('"')
-                if start > 0 and end > start:
-                    return line[start:end]
-        return text  # Если не нашли — возвращаем оригинал
+        m = _OUT_RE.search(result.stdout)
+        return m.group(1).decode('utf-8') if m else text  # Если не нашли — возвращаем оригинал
     except subprocess.TimeoutExpired:
         return text
     except Exception as e:
@@ -44,73 +109,298 @@ def run_cli(text: str) -> str:
         return text
 
 
+def _feed_stdin(stdin, payload: bytes):
+    """Пишет все входы в stdin CLI и закрывает его; умерший CLI тут не ошибка — её увидит читатель"""
+    try:
+        stdin.write(payload)
+        stdin.close()
+    except OSError:
+        pass
+
+
+def _run_batch_shard(texts: list[str]) -> list[str]:
+    """Прогоняет тексты через один процесс `CLI --batch` (строка на вход → строка на выход).
+
+    Дедлайн — CLI_TIMEOUT на каждую строку вывода, а не на весь шард:
+    зависший вход обрывает прогон через 10 секунд, а не через 10·N.
+    Первая строка должна быть BATCH_READY_MARKER, иначе CLI не знает --batch.
+    """
+    # Протокол построчный, поэтому переводы строк внутри текста заменяем пробелом
+    payload = ''.join(text.replace('\n', ' ') + '\n' for text in texts).encode('utf-8')
+    proc = subprocess.Popen(
+        [str(CLI_PATH), '--batch'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL  # подробный лог processText
+    )
+    # Входы пишем из отдельного потока, чтобы CLI не встал на полном пайпе stdout
+    threading.Thread(target=_feed_stdin, args=(proc.stdin, payload), daemon=True).start()
+
+    fd = proc.stdout.fileno()
+    lines = []
+    buf = bytearray()
+    try:
+        while len(lines) <= len(texts):
+            ready, _, _ = select.select([fd], [], [], CLI_TIMEOUT)
+            if not ready:
+                raise TimeoutError(f"CLI --batch timed out on input {len(lines) + 1}")
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            buf += chunk
+            *complete, buf = buf.split(b'\n')
+            lines.extend(complete)
+        returncode = proc.wait(timeout=CLI_TIMEOUT)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+    if not lines or lines[0] != BATCH_READY_MARKER:
+        raise RuntimeError("CLI does not support --batch (no ready marker), rebuild TextSwitcherCLI")
+    if returncode != 0:
+        raise RuntimeError(f"CLI --batch exited with code {returncode}")
+    if len(lines) != len(texts) + 1 or buf:
+        raise RuntimeError(f"CLI --batch returned {len(lines) - 1} lines for {len(texts)} inputs")
+    return [line.decode('utf-8') for line in lines[1:]]
+
+
+def run_cli_batch(texts: list[str], shards: int = MAX_WORKERS) -> list[str]:
+    """Делит тексты на шарды и гоняет их параллельно в отдельных процессах `CLI --batch`"""
+    shards = max(1, min(shards, len(texts) // MIN_SHARD_SIZE))
+    if shards == 1:
+        return _run_batch_shard(texts)
+
+    # Непрерывные шарды: склеенные по порядку выходы совпадают с порядком входов
+    size = -(-len(texts) // shards)
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    outputs = [None] * len(chunks)
+    errors = []
+
+    def drain(i: int):
+        try:
+            outputs[i] = _run_batch_shard(chunks[i])
+        except (OSError, subprocess.SubprocessError, RuntimeError) as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=drain, args=(i,)) for i in range(len(chunks))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return [out for chunk in outputs for out in chunk]
+
+
+def cli_fingerprint() -> str:
+    """Состояние всего, от чего зависит вывод CLI: бинарник, JSON-ресурсы
+    (Resources рядом с бинарником или Dictum/Resources) и пользовательские списки"""
+    paths = [CLI_PATH]
+    for res_dir in (CLI_PATH.parent / "Resources", PROJECT_DIR / "Dictum" / "Resources"):
+        if res_dir.is_dir():
+            paths.extend(sorted(res_dir.glob("*.json")))
+    paths.append(USER_DATA_DIR / "forced_conversions.json")
+    paths.append(USER_DATA_DIR / "text_switcher_exceptions.json")
+
+    parts = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue  # появление файла тоже меняет отпечаток
+        parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+    return "|".join(parts)
+
+
+def cli_cache_key(text: str, fingerprint: str) -> str:
+    """Ключ кэша: пересборка CLI или правка его данных инвалидирует все записи"""
+    return hashlib.sha256(f"{fingerprint}|{text}".encode('utf-8')).hexdigest()
+
+
+def load_cli_cache() -> dict:
+    """Загружает кэш выходов CLI с прошлых прогонов"""
+    try:
+        with open(RESULTS_DIR / '.cli_cache.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cli_cache(cache: dict):
+    """Сохраняет кэш выходов CLI"""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_DIR / '.cli_cache.json', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
 def load_corpus() -> dict:
-    """Загружает тестовый корпус"""
+    """Загружает тестовый корпус (через orjson, если установлен)"""
+    if orjson is not None:
+        with open(CORPUS_PATH, 'rb') as f:
+            return orjson.loads(f.read())
     with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
-def run_tests() -> dict:
-    """Запускает все тесты и возвращает результаты"""
-    corpus = load_corpus()
+def iter_tests():
+    """Отдаёт пары (категория, тест) в порядке корпуса"""
+    for category_name, category_data in load_corpus().get('categories', {}).items():
+        for test in category_data.get('tests', []):
+            yield category_name, test
+
+
+def _classify_numpy(results: dict, flat: list, inputs: list[str], outputs: list[str]):
+    """Векторная классификация pass/FP/FN по всем тестам; те же счётчики и записи ошибок"""
+    tests = [test for _, test in flat]
+    n = len(tests)
+    by_category = results['by_category']
+    cat_index = {name: i for i, name in enumerate(by_category)}
+
+    inp = np.array(inputs, dtype=object)
+    actual = np.array(outputs, dtype=object)
+    expected = np.array([test.get('expected', '') for test in tests], dtype=object)
+    should = np.fromiter((bool(test.get('should_convert', True)) for test in tests), dtype=bool, count=n)
+    cat_ids = np.fromiter((cat_index[name] for name, _ in flat), dtype=np.intp, count=n)
+
+    failed = expected != actual
+    fn = failed & should & (actual == inp)
+    fp = failed & ~should
+
+    def per_category(mask=None):
+        ids = cat_ids if mask is None else cat_ids[mask]
+        return np.bincount(ids, minlength=len(cat_index)).tolist()
+
+    for name, total, n_failed, n_fp, n_fn in zip(
+            by_category, per_category(), per_category(failed), per_category(fp), per_category(fn)):
+        by_category[name].update(
+            total=total, passed=total - n_failed, failed=n_failed, fp=n_fp, fn=n_fn)
+
+    n_failed = int(np.count_nonzero(failed))
+    results['total'] = n
+    results['passed'] = n - n_failed
+    results['failed'] = n_failed
+    error_types = results['error_types']
+    error_types['false_negative'] = int(np.count_nonzero(fn))
+    error_types['false_positive'] = int(np.count_nonzero(fp))
+    error_types['wrong_conversion'] = n_failed - error_types['false_negative'] - error_types['false_positive']
+
+    # Записи об ошибках — только по упавшим тестам, в порядке корпуса
+    errors = results['errors']
+    errors_by_type = results['errors_by_type']
+    for i in np.flatnonzero(failed).tolist():
+        category_name, test = flat[i]
+        error_type = 'false_negative' if fn[i] else 'false_positive' if fp[i] else 'wrong_conversion'
+        error = TestError(
+            test.get('id', f'unknown_{i + 1}'), category_name, inputs[i],
+            test.get('expected', ''), outputs[i], error_type
+        )
+        errors.append(error)
+        errors_by_type[error_type].append(error)
+
+
+def run_tests(now: datetime, use_cache: bool = True) -> dict:
+    """Запускает все тесты и возвращает результаты (use_cache=False — без дискового кэша)"""
     results = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now.isoformat(),
         'total': 0,
         'passed': 0,
         'failed': 0,
         'errors': [],
-        'by_category': defaultdict(lambda: {'total': 0, 'passed': 0, 'failed': 0, 'fp': 0, 'fn': 0}),
-        'error_types': defaultdict(int)
+        'by_category': {},
+        'error_types': {'false_negative': 0, 'wrong_conversion': 0, 'false_positive': 0},
+        # Те же записи, что в errors, сгруппированные по типу для отчёта
+        'errors_by_type': defaultdict(list)
     }
 
-    for category_name, category_data in corpus.get('categories', {}).items():
-        tests = category_data.get('tests', [])
-
-        for test in tests:
-            results['total'] += 1
-            results['by_category'][category_name]['total'] += 1
+    # Плоский список (категория, тест) — CLI гоняем параллельно, а результаты
+    # собираем в основном процессе, чтобы агрегация оставалась без блокировок
+    flat = list(iter_tests())
+    by_category = results['by_category']
+    for category_name, _ in flat:
+        if category_name not in by_category:
+            by_category[category_name] = {'total': 0, 'passed': 0, 'failed': 0, 'fp': 0, 'fn': 0}
+    inputs = [test.get('corrupted', test.get('input', '')) for _, test in flat]
+
+    # Дубликаты и входы, уже прогнанные этой сборкой CLI с теми же данными, повторно не запускаем
+    cache = load_cli_cache() if use_cache else {}
+    fingerprint = cli_fingerprint()
+    keys = [cli_cache_key(text, fingerprint) for text in inputs]
+    pending = {}
+    for key, text in zip(keys, inputs):
+        if key in cache:
+            continue
+        if nothing_to_convert(text):
+            cache[key] = text
+        else:
+            pending.setdefault(key, text)
+
+    if pending:
+        # Один процесс на все входы; если batch не сработал — по разовому запуску на тест
+        try:
+            outputs = run_cli_batch(list(pending.values()))
+        except (OSError, subprocess.SubprocessError, RuntimeError) as e:
+            print(f"Batch mode failed ({e}), falling back to per-test CLI runs")
+            with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                outputs = list(executor.map(run_cli, pending.values(), chunksize=32))
+            # Разовые запуски возвращают вход при таймауте — такое на диск не пишем
+            cache.update(zip(pending, outputs))
+        else:
+            cache.update(zip(pending, outputs))
+            if use_cache:
+                # Храним только записи этого корпуса, старые сборки CLI не копятся
+                save_cli_cache({key: cache[key] for key in keys})
+
+    outputs = [cache[key] for key in keys]
+
+    if np is not None and len(flat) >= _NUMPY_MIN_TESTS:
+        _classify_numpy(results, flat, inputs, outputs)
+        return results
+
+    error_types = results['error_types']
+    errors = results['errors']
+    errors_by_type = results['errors_by_type']
+    for (category_name, test), input_text, actual in zip(flat, inputs, outputs):
+        cat_stats = by_category[category_name]
+        results['total'] += 1
+        cat_stats['total'] += 1
+
+        expected = test.get('expected', '')
+        should_convert = test.get('should_convert', True)
+        test_id = test.get('id', f'unknown_{results["total"]}')
+
+        # Сравниваем
+        if actual == expected:
+            results['passed'] += 1
+            cat_stats['passed'] += 1
+        else:
+            results['failed'] += 1
+            cat_stats['failed'] += 1
+
+            # Определяем тип ошибки
+            if should_convert:
+                if actual == input_text:
+                    error_type = 'false_negative'
+                    cat_stats['fn'] += 1
+                else:
+                    error_type = 'wrong_conversion'
+            else:
+                error_type = 'false_positive'
+                cat_stats['fp'] += 1
 
-            input_text = test.get('corrupted', test.get('input', ''))
-            expected = test.get('expected', '')
-            should_convert = test.get('should_convert', True)
-            test_id = test.get('id', f'unknown_{results["total"]}')
+            error_types[error_type] += 1
+            error = TestError(test_id, category_name, input_text, expected, actual, error_type)
+            errors.append(error)
+            errors_by_type[error_type].append(error)
 
-            # Запускаем CLI
-            actual = run_cli(input_text)
+    return results
 
-            # Сравниваем
-            if actual == expected:
-                results['passed'] += 1
-                results['by_category'][category_name]['passed'] += 1
-            else:
-                results['failed'] += 1
-                results['by_category'][category_name]['failed'] += 1
-
-                # Определяем тип ошибки
-                if should_convert:
-                    if actual == input_text:
-                        error_type = 'false_negative'
-                        results['by_category'][category_name]['fn'] += 1
-                    else:
-                        error_type = 'wrong_conversion'
-                else:
-                    error_type = 'false_positive'
-                    results['by_category'][category_name]['fp'] += 1
-
-                results['error_types'][error_type] += 1
-                results['errors'].append({
-                    'id': test_id,
-                    'category': category_name,
-                    'input': input_text,
-                    'expected': expected,
-                    'actual': actual,
-                    'error_type': error_type
-                })
 
-    return results
+Metrics = namedtuple('Metrics', ['accuracy', 'precision', 'recall', 'f1'])
 
 
-def calculate_metrics(results: dict) -> dict:
+def calculate_metrics(results: dict) -> Metrics:
     """Вычисляет precision, recall, F1"""
     total = results['total']
     passed = results['passed']
@@ -123,104 +413,137 @@ def calculate_metrics(results: dict) -> dict:
     fn = results['error_types'].get('false_negative', 0)
     tp = passed
 
-    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
+    tp_fp = tp + fp
+    tp_fn = tp + fn
+    precision = tp / tp_fp if tp_fp > 0 else 0
+    recall = tp / tp_fn if tp_fn > 0 else 0
+    pr_sum = precision + recall
+    f1 = 2 * precision * recall / pr_sum if pr_sum > 0 else 0
 
-    return {
-        'accuracy': passed / total if total > 0 else 0,
-        'precision': precision,
-        'recall': recall,
-        'f1': f1
-    }
+    return Metrics(passed / total if total > 0 else 0, precision, recall, f1)
 
 
-def generate_report(results: dict) -> str:
+def generate_report(results: dict, now: datetime) -> str:
     """Генерирует Markdown отчёт"""
     metrics = calculate_metrics(results)
 
-    report = f"""# TextSwitcher Validation Report
+    buf = [f"""# TextSwitcher Validation Report
 
-**Дата:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Дата:** {now.strftime('%Y-%m-%d %H:%M:%S')}
 
 ## Summary
 
 - **Total tests:** {results['total']}
-- **Passed:** {results['passed']} ({metrics['accuracy']*100:.1f}%)
+- **Passed:** {results['passed']} ({metrics.accuracy*100:.1f}%)
 - **Failed:** {results['failed']}
 
 ### Metrics
 
 | Metric | Value |
 |--------|-------|
-| Accuracy | {metrics['accuracy']*100:.1f}% |
-| Precision | {metrics['precision']*100:.1f}% |
-| Recall | {metrics['recall']*100:.1f}% |
-| F1 Score | {metrics['f1']*100:.1f}% |
+| Accuracy | {metrics.accuracy*100:.1f}% |
+| Precision | {metrics.precision*100:.1f}% |
+| Recall | {metrics.recall*100:.1f}% |
+| F1 Score | {metrics.f1*100:.1f}% |
 
 ## By Category
 
 | Category | Tests | Passed | Failed | Accuracy | FP | FN |
 |----------|-------|--------|--------|----------|----|----|
-"""
-
-    for cat, data in sorted(results['by_category'].items()):
-        acc = data['passed'] / data['total'] * 100 if data['total'] > 0 else 0
-        report += f"| {cat} | {data['total']} | {data['passed']} | {data['failed']} | {acc:.1f}% | {data['fp']} | {data['fn']} |\n"
-
-    report += "\n## Error Analysis\n\n"
+"""]
+
+    by_category = results['by_category']
+    buf.append("".join(
+        f"| {cat} | {data['total']} | {data['passed']} | {data['failed']} | "
+        f"{(data['passed'] / data['total'] * 100 if data['total'] > 0 else 0):.1f}% | {data['fp']} | {data['fn']} |\n"
+        for cat, data in sorted(by_category.items())
+    ))
+
+    buf.append("\n## Error Analysis\n\n")
+
+    # Доля типа ошибки = len(errors) * inv_failed; деление одно на весь отчёт
+    inv_failed = 100.0 / results['failed'] if results['failed'] else 0.0
+    for error_type, errors in sorted(results['errors_by_type'].items(), key=lambda x: -len(x[1])):
+        pct = len(errors) * inv_failed
+        buf.append(f"### {error_type} ({len(errors)} errors, {pct:.1f}%)\n\n")
+        buf.append("| Input | Expected | Actual | Category |\n")
+        buf.append("|-------|----------|--------|----------|\n")
+
+        buf.append("".join(  # Показываем первые 10
+            f"| `{error.input}` | `{error.expected}` | `{error.actual}` | {error.category} |\n"
+            for error in errors[:10]
+        ))
 
-    # Группируем ошибки по типам
-    errors_by_type = defaultdict(list)
-    for error in results['errors']:
-        errors_by_type[error['error_type']].append(error)
+        if len(errors) > 10:
+            buf.append(f"\n*...and {len(errors) - 10} more*\n")
+        buf.append("\n")
 
-    for error_type, errors in sorted(errors_by_type.items(), key=lambda x: -len(x[1])):
-        pct = len(errors) / results['failed'] * 100 if results['failed'] > 0 else 0
-        report += f"### {error_type} ({len(errors)} errors, {pct:.1f}%)\n\n"
-        report += "| Input | Expected | Actual | Category |\n"
-        report += "|-------|----------|--------|----------|\n"
+    # Проблемные категории
+    buf.append("## Problem Categories\n\n")
+    # Сортируем только упавшие категории; при равенстве — в порядке корпуса
+    problem_cats = sorted(
+        ((cat, data) for cat, data in by_category.items() if data['failed'] > 0),
+        key=lambda x: -x[1]['failed']
+    )
+    buf.append("".join(
+        f"### {cat}\n"
+        f"- Failed: {data['failed']}/{data['total']} ({data['failed']/data['total']*100:.1f}%)\n"
+        f"- False Positives: {data['fp']}\n"
+        f"- False Negatives: {data['fn']}\n\n"
+        for cat, data in problem_cats
+    ))
+
+    return "".join(buf)
+
+
+def _write_csv(path: Path, errors: list):
+    """Пишет ошибки в CSV"""
+    with open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['id', 'category', 'input', 'expected', 'actual', 'error_type'])
+        writer.writerows(
+            [e.id, e.category, e.input, e.expected, e.actual, e.error_type]
+            for e in errors
+        )
 
-        for error in errors[:10]:  # Показываем первые 10
-            report += f"| `{error['input']}` | `{error['expected']}` | `{error['actual']}` | {error['category']} |\n"
 
-        if len(errors) > 10:
-            report += f"\n*...and {len(errors) - 10} more*\n"
-        report += "\n"
+def _write_md(path: Path, report: str):
+    """Пишет Markdown отчёт"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(report)
 
-    # Проблемные категории
-    report += "## Problem Categories\n\n"
-    for cat, data in sorted(results['by_category'].items(), key=lambda x: x[1]['failed'], reverse=True):
-        if data['failed'] > 0:
-            report += f"### {cat}\n"
-            report += f"- Failed: {data['failed']}/{data['total']} ({data['failed']/data['total']*100:.1f}%)\n"
-            report += f"- False Positives: {data['fp']}\n"
-            report += f"- False Negatives: {data['fn']}\n\n"
 
-    return report
+def _write_json(path: Path, results: dict):
+    """Пишет полные результаты в JSON — для скриптов и CI"""
+    # errors_by_type лишь перегруппировывает errors — в файл не дублируем
+    dump = {key: value for key, value in results.items() if key != 'errors_by_type'}
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(dump))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dump, f, ensure_ascii=False, default=asdict)
 
 
-def save_results(results: dict, report: str):
-    """Сохраняет результаты"""
+async def save_results(results: dict, report: str, now: datetime):
+    """Сохраняет результаты; файлы независимы, поэтому пишутся параллельно в потоках"""
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-    # Сохраняем JSON с ошибками
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
     errors_file = RESULTS_DIR / f'errors_{timestamp}.csv'
-    with open(errors_file, 'w', encoding='utf-8') as f:
-        f.write('id,category,input,expected,actual,error_type\n')
-        for error in results['errors']:
-            f.write(f"{error['id']},{error['category']},{error['input']},{error['expected']},{error['actual']},{error['error_type']}\n")
-
-    # Сохраняем отчёт
     report_file = RESULTS_DIR / f'report_{timestamp}.md'
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+    results_file = RESULTS_DIR / f'results_{timestamp}.json'
+
+    await asyncio.gather(
+        asyncio.to_thread(_write_csv, errors_file, results['errors']),
+        asyncio.to_thread(_write_md, report_file, report),
+        asyncio.to_thread(_write_json, results_file, results),
+    )
 
     print(f"Results saved to:")
     print(f"  - {errors_file}")
     print(f"  - {report_file}")
+    print(f"  - {results_file}")
 
 
 def main():
@@ -245,30 +568,33 @@ def main():
 
     # Запускаем тесты
     print("Running tests...")
-    results = run_tests()
+    # Одно время запуска на всё: отметка в результатах, дата в отчёте и имена файлов
+    now = datetime.now()
+    # --no-cache: прогнать весь корпус через CLI, не читая и не обновляя .cli_cache.json
+    results = run_tests(now, use_cache='--no-cache' not in sys.argv)
 
     # Генерируем отчёт
-    report = generate_report(results)
+    report = generate_report(results, now)
 
     # Сохраняем результаты
-    save_results(results, report)
+    asyncio.run(save_results(results, report, now))
 
     # Выводим summary
     print()
     print("=" * 60)
     metrics = calculate_metrics(results)
-    print(f"  RESULTS: {results['passed']}/{results['total']} passed ({metrics['accuracy']*100:.1f}%)")
-    print(f"  Precision: {metrics['precision']*100:.1f}%")
-    print(f"  Recall: {metrics['recall']*100:.1f}%")
-    print(f"  F1: {metrics['f1']*100:.1f}%")
+    print(f"  RESULTS: {results['passed']}/{results['total']} passed ({metrics.accuracy*100:.1f}%)")
+    print(f"  Precision: {metrics.precision*100:.1f}%")
+    print(f"  Recall: {metrics.recall*100:.1f}%")
+    print(f"  F1: {metrics.f1*100:.1f}%")
     print("=" * 60)
 
     # Exit code based on results
-    if metrics['accuracy'] >= 0.99:
+    if metrics.accuracy >= 0.99:
         print("\n SUCCESS: 99%+ accuracy achieved!")
         sys.exit(0)
     else:
-        print(f"\n Target: 99%+ accuracy, Current: {metrics['accuracy']*100:.1f}%")
+        print(f"\n Target: 99%+ accuracy, Current: {metrics.accuracy*100:.1f}%")
         sys.exit(1)
 
 